@@ -0,0 +1,211 @@
+"""Performance benchmarks with a JSON baseline and regression gate.
+
+    python bench.py run --scale small -o bench_baseline.json
+    python bench.py compare bench_baseline.json --threshold 0.25
+
+``compare`` exits 1 when a stage's best-of-N latency or peak memory grows by
+more than ``--threshold``.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+
+from loadtest import percentile
+
+# /analyze must parse on every request, not answer from the result cache.
+os.environ.setdefault("CLEARPASS_CACHE_DIR", "")
+os.environ.setdefault("CLEARPASS_CACHE_MEMORY_ITEMS", "0")
+os.environ.setdefault("CLEARPASS_JOB_WORKERS", "0")
+
+SCALES = {
+    "small": {"rows": 10_000, "periods": 5, "pages": 4, "repeat": 5},
+    "medium": {"rows": 100_000, "periods": 12, "pages": 20, "repeat": 5},
+    "large": {"rows": 1_000_000, "periods": 30, "pages": 100, "repeat": 3},
+}
+
+def _asgi_post(app, path, filename, data):
+    """POST one multipart upload to an ASGI app in-process; returns ``(status, body)``."""
+    boundary = uuid.uuid4().hex
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+            f"Content-Type: application/octet-stream\r\n\r\n").encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+             "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"", "root_path": "",
+             "headers": [(b"content-type", f"multipart/form-data; boundary={boundary}".encode()),
+                         (b"content-length", str(len(body)).encode())],
+             "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80)}
+    sent = False
+    out = {"status": None, "body": b""}
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            out["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            out["body"] += message.get("body", b"")
+
+    asyncio.run(app(scope, receive, send))
+    return out["status"], out["body"]
+
+def stages(scale):
+    """``{name: (items, fn)}`` for a scale preset; inputs are generated up front."""
+    import numpy as np
+    import pandas as pd
+    from synth import synthetic_statement, synthetic_pdf
+    from shared.parsing import (parse_financials, parse_financials_csv, parse_financials_periods, parse_records,
+                                read_csv_records, compute_ratios, compute_ratios_frame, benchmark_for)
+    from parser_pdf import extract_tables_to_long
+    from rendering import render_report_pdf, render_memo_docx
+    from stress import DEFAULT_GRID, stress_test
+
+    rows, periods, pages = scale["rows"], scale["periods"], scale["pages"]
+    long_df = synthetic_statement(rows, layout="long")
+    long_csv = long_df.to_csv(index=False).encode("utf-8")
+    wide_df = synthetic_statement(max(rows // 10, 20), periods, layout="wide")
+    pdf = synthetic_pdf(pages, periods=2)
+    basics, _ = parse_financials(long_df)
+    ratios = compute_ratios(basics)
+    bench = benchmark_for("Wholesale Trade")
+    period_basics, _ = parse_financials_periods(wide_df)
+    many_basics = pd.concat([period_basics] * max(rows // max(len(period_basics), 1), 1), ignore_index=True)
+    small_csv = synthetic_statement(1000).to_csv(index=False).encode("utf-8")
+
+    def analyze_api():
+        import main
+        status, _ = _asgi_post(main.app, "/analyze", "statement.csv", small_csv)
+        if status != 200:
+            raise RuntimeError(f"/analyze returned {status}")
+
+    return {
+        "parse_long": (rows, lambda: parse_financials(long_df)),
+        "parse_csv_lean": (rows, lambda: parse_records(*read_csv_records(long_csv))),
+        "parse_csv_stream": (rows, lambda: parse_financials_csv(io.BytesIO(long_csv))),
+        "parse_wide_periods": (len(wide_df) * periods, lambda: parse_financials_periods(wide_df)),
+        "compute_ratios": (1, lambda: compute_ratios(basics)),
+        "compute_ratios_frame": (len(many_basics), lambda: compute_ratios_frame(many_basics)),
+        "stress_test": (int(np.prod([len(v) for v in DEFAULT_GRID.values()])), lambda: stress_test(basics)),
+        "extract_pdf": (pages, lambda: extract_tables_to_long(pdf, cache=False)),
+        "render_pdf": (1, lambda: render_report_pdf("BenchCo", "2024", "Wholesale Trade", basics, ratios, bench)),
+        "render_docx": (1, lambda: render_memo_docx("BenchCo", "2024", "Wholesale Trade", basics, ratios, bench)),
+        "analyze_api": (1, analyze_api),
+    }
+
+def measure(fn, items, repeat):
+    """Latency percentiles over ``repeat`` timed calls (after one warm-up), then one traced call for peak memory."""
+    fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    median = statistics.median(times)
+    return {
+        "items": items,
+        "runs": repeat,
+        "min_ms": round(min(times) * 1000, 3),
+        "p50_ms": round(median * 1000, 3),
+        "p90_ms": round(percentile(times, 90) * 1000, 3),
+        "p99_ms": round(percentile(times, 99) * 1000, 3),
+        "throughput_per_s": round(items / median, 1) if items and median > 0 else None,
+        "peak_mb": round(peak / (1024 * 1024), 2),
+    }
+
+def run(scale_name="small", only=None, repeat=None):
+    scale = dict(SCALES[scale_name])
+    if repeat:
+        scale["repeat"] = repeat
+    import numpy as np
+    import pandas as pd
+    report = {
+        "meta": {"scale": scale_name, **scale, "python": platform.python_version(), "numpy": np.__version__,
+                 "pandas": pd.__version__, "platform": platform.platform(), "cpu_count": os.cpu_count(),
+                 "created": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "stages": {},
+    }
+    for name, (items, fn) in stages(scale).items():
+        if only and name not in only:
+            continue
+        report["stages"][name] = measure(fn, items, scale["repeat"])
+        print(f"{name:<22} p50 {report['stages'][name]['p50_ms']:>10.2f} ms   "
+              f"peak {report['stages'][name]['peak_mb']:>8.2f} MB", file=sys.stderr)
+    return report
+
+def compare(baseline, current, threshold=0.25, min_ms=2.0, min_mb=1.0):
+    """``[(stage, metric, baseline, current)]`` for every stage that regressed past ``threshold``.
+
+    Stages missing from either report are skipped.
+    """
+    regressions = []
+    for stage, base in baseline["stages"].items():
+        cur = current["stages"].get(stage)
+        if cur is None:
+            continue
+        for metric, slack in (("min_ms", min_ms), ("peak_mb", min_mb)):
+            b, c = base.get(metric), cur.get(metric)
+            if b is None or c is None:
+                continue
+            if c > b * (1 + threshold) and c - b > slack:
+                regressions.append((stage, metric, b, c))
+    return regressions
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="ClearPass performance benchmarks.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="run the benchmarks and write a JSON report")
+    r.add_argument("--scale", choices=sorted(SCALES), default="small")
+    r.add_argument("--stages", nargs="*")
+    r.add_argument("--repeat", type=int)
+    r.add_argument("-o", "--output", default="bench_baseline.json")
+    c = sub.add_parser("compare", help="fail when a stage regressed against a baseline")
+    c.add_argument("baseline")
+    c.add_argument("--current", help="report to compare (default: run the baseline's scale now)")
+    c.add_argument("--threshold", type=float, default=0.25, help="allowed relative growth (0.25 = +25%%)")
+    c.add_argument("--min-ms", type=float, default=2.0)
+    c.add_argument("--min-mb", type=float, default=1.0)
+    c.add_argument("--repeat", type=int)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "run":
+        report = run(args.scale, args.stages, args.repeat)
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+        return 0
+
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)
+    if args.current:
+        with open(args.current) as fh:
+            current = json.load(fh)
+    else:
+        current = run(baseline["meta"]["scale"], list(baseline["stages"]), args.repeat)
+    regressions = compare(baseline, current, args.threshold, args.min_ms, args.min_mb)
+    for stage, base in baseline["stages"].items():
+        cur = current["stages"].get(stage, {})
+        print(f"{stage:<22} min {base['min_ms']:>10.2f} -> {cur.get('min_ms', float('nan')):>10.2f} ms   "
+              f"peak {base['peak_mb']:>8.2f} -> {cur.get('peak_mb', float('nan')):>8.2f} MB")
+    for stage, metric, b, c in regressions:
+        print(f"REGRESSION {stage} {metric}: {b} -> {c} (+{(c / b - 1) * 100:.0f}%)" if b else
+              f"REGRESSION {stage} {metric}: {b} -> {c}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""Cold-start import benchmark.
+
+    python bench_import.py                 # table of median import times
+    python bench_import.py --max-ms 800    # exit 1 if any module is slower
+"""
+import argparse, json, statistics, subprocess, sys
+
+MODULES = ["shared.parsing", "main", "rendering", "parser_pdf", "jobs"]
+HEAVY = ["pandas", "matplotlib", "pdfplumber", "docx"]
+
+_PROBE = """
+import sys, time, json
+t = time.perf_counter()
+import {module}
+ms = (time.perf_counter() - t) * 1000
+print(json.dumps({{"ms": ms, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def measure(module, repeat=5):
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY)],
+                             capture_output=True, text=True, check=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {"module": module, "median_ms": round(statistics.median(r["ms"] for r in runs), 1),
+            "heavy_imports": runs[-1]["heavy"]}
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Measure cold import time of ClearPass modules.")
+    ap.add_argument("modules", nargs="*", default=MODULES)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--max-ms", type=float, help="fail when any module's median exceeds this")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args(argv)
+    report = [measure(m, args.repeat) for m in args.modules]
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for r in report:
+            print(f"{r['module']:<16} {r['median_ms']:>8.1f} ms   heavy: {', '.join(r['heavy_imports']) or '-'}")
+    slow = [r for r in report if args.max_ms is not None and r["median_ms"] > args.max_ms]
+    return 1 if slow else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
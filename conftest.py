@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from shared.parsing import RATIO_INPUTS
+
+def _noisy_long(n=2000, seed=7):
+    rng = np.random.default_rng(seed)
+    labels = ["Net Sales", "Cost of Revenue", "  TOTAL   Liabilities ", "Liabilities and Equity", "Inventories",
+              "Stock-in-trade", "Cash and cash equivalents", "Finance cost", "Interest paid", "Loan repayment",
+              "Other income", "Total shareholders' equity", "Short term debt", "Non-current borrowings", "EBITDA"]
+    vals = rng.normal(1e5, 5e4, n).round(2).astype(str)
+    vals[::11] = "(1,234.50)"
+    vals[::17] = "n/a"
+    return pd.DataFrame({"Account": rng.choice(labels, n), "Value": vals})
+
+def _gl_csv(n=5000, seed=3):
+    rng = np.random.default_rng(seed)
+    labels = ["Net Sales", "Cost of revenue", "Trade receivables", "Inventories", "Cash", "Finance costs",
+              "Total current liabilities", "Total equity", "Misc expense", ""]
+    vals = rng.normal(0, 1e6, n).round(2)
+    text = [f"${v:,.2f}" if i % 3 == 0 else (f"({-v:,.2f})" if v < 0 else f"{v}") for i, v in enumerate(vals)]
+    text[::13] = [""] * len(text[::13])
+    df = pd.DataFrame({"Account": rng.choice(labels, n), "Value": text})
+    return df.to_csv(index=False)
+
+def _random_basics(n=5000, seed=11):
+    rng = np.random.default_rng(seed)
+    data = {}
+    for k in RATIO_INPUTS:
+        v = rng.normal(0, 1e5, n).round(rng.integers(0, 4))
+        v[rng.random(n) < 0.15] = np.nan
+        v[rng.random(n) < 0.1] = 0.0
+        v[rng.random(n) < 0.02] = -0.0
+        data[k] = v
+    return pd.DataFrame(data)
+
+@pytest.fixture
+def noisy_long():
+    """Long statement with messy labels, ``(x)`` negatives and ``n/a`` values."""
+    return _noisy_long
+
+@pytest.fixture
+def gl_csv():
+    """GL-style CSV text with currency symbols, thousands separators and blanks."""
+    return _gl_csv
+
+@pytest.fixture
+def random_basics():
+    """Basics frame over ``RATIO_INPUTS`` with NaNs, zeros and signed zeros."""
+    return _random_basics
@@ -0,0 +1,250 @@
+"""Persistent job queue for long-running analyses.
+
+Jobs live in a SQLite file (``CLEARPASS_JOB_DB``). Workers renew a lease on
+the job they run; expired leases are requeued, up to ``CLEARPASS_JOB_MAX_ATTEMPTS``.
+Run standalone workers with ``python jobs.py --workers 4``.
+"""
+import argparse
+import base64
+import io
+import json
+import math
+import multiprocessing
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+JOB_DB = os.environ.get("CLEARPASS_JOB_DB", os.path.join(tempfile.gettempdir(), "clearpass_jobs.sqlite"))
+JOB_TTL_HOURS = float(os.environ.get("CLEARPASS_JOB_TTL_HOURS", 24))
+JOB_POLL_SECONDS = float(os.environ.get("CLEARPASS_JOB_POLL_SECONDS", 0.5))
+JOB_LEASE_SECONDS = float(os.environ.get("CLEARPASS_JOB_LEASE_SECONDS", 60))
+JOB_MAX_ATTEMPTS = int(os.environ.get("CLEARPASS_JOB_MAX_ATTEMPTS", 3))
+
+STAGES = ["read", "parse", "ratios", "benchmark", "memo", "report"]
+
+class JobStore:
+    def __init__(self, path=JOB_DB, ttl_hours=JOB_TTL_HOURS, lease_seconds=JOB_LEASE_SECONDS,
+                 max_attempts=JOB_MAX_ATTEMPTS):
+        self.path = path
+        self.ttl = ttl_hours * 3600
+        self.lease = lease_seconds
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY, status TEXT, stage TEXT, progress REAL,
+                filename TEXT, payload BLOB, params TEXT, result TEXT, error TEXT,
+                host TEXT, pid INTEGER, created REAL, updated REAL, finished REAL, attempts INTEGER DEFAULT 0)""")
+            if "attempts" not in [c[1] for c in con.execute("PRAGMA table_info(jobs)")]:
+                con.execute("ALTER TABLE jobs ADD COLUMN attempts INTEGER DEFAULT 0")
+            con.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def submit(self, filename: str, data: bytes, params=None) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as con:
+            con.execute("INSERT INTO jobs (id, status, stage, progress, filename, payload, params, created, updated) "
+                        "VALUES (?, 'queued', NULL, 0, ?, ?, ?, ?, ?)",
+                        (job_id, filename, data, json.dumps(params or {}), now, now))
+        return job_id
+
+    def get(self, job_id: str):
+        with self._connect() as con:
+            row = con.execute("SELECT id, status, stage, progress, filename, result, error, created, updated, finished "
+                              "FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        keys = ["id", "status", "stage", "progress", "filename", "result", "error", "created", "updated", "finished"]
+        job = dict(zip(keys, row))
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def claim(self):
+        """Atomically move the oldest queued job to ``running``; returns ``(id, filename, payload, params)``."""
+        with self._connect() as con:
+            row = con.execute(
+                "UPDATE jobs SET status = 'running', host = ?, pid = ?, updated = ?, attempts = attempts + 1 "
+                "WHERE id = (SELECT id FROM jobs WHERE status = 'queued' ORDER BY created LIMIT 1) "
+                "RETURNING id, filename, payload, params",
+                (socket.gethostname(), os.getpid(), time.time())).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], row[2], json.loads(row[3])
+
+    def heartbeat(self, job_id: str):
+        """Renew this worker's lease on a running job."""
+        with self._connect() as con:
+            con.execute("UPDATE jobs SET updated = ? WHERE id = ? AND status = 'running' AND host = ? AND pid = ?",
+                        (time.time(), job_id, socket.gethostname(), os.getpid()))
+
+    def progress(self, job_id: str, stage: str):
+        with self._connect() as con:
+            con.execute("UPDATE jobs SET stage = ?, progress = ?, updated = ? WHERE id = ?",
+                        (stage, round(STAGES.index(stage) / len(STAGES), 2), time.time(), job_id))
+
+    def finish(self, job_id: str, result=None, error=None):
+        now = time.time()
+        with self._connect() as con:
+            con.execute("UPDATE jobs SET status = ?, progress = ?, result = ?, error = ?, payload = NULL, "
+                        "updated = ?, finished = ? WHERE id = ?",
+                        ("failed" if error else "done", None if error else 1.0,
+                         None if result is None else json.dumps(result), error, now, now, job_id))
+
+    def recover(self):
+        """Reclaim running jobs whose lease expired (or whose worker on this host is gone); returns how many.
+
+        Reclaimed jobs go back in the queue, or fail once they used up ``max_attempts``.
+        """
+        host = socket.gethostname()
+        now = time.time()
+        with self._connect() as con:
+            rows = con.execute("SELECT id, host, pid, updated, attempts FROM jobs WHERE status = 'running'").fetchall()
+            lost = [(job_id, attempts) for job_id, h, pid, updated, attempts in rows
+                    if updated < now - self.lease or (h == host and not _alive(pid))]
+            con.executemany("UPDATE jobs SET status = 'queued', stage = NULL, progress = 0 WHERE id = ? AND status = 'running'",
+                            [(job_id,) for job_id, attempts in lost if attempts < self.max_attempts])
+            con.executemany("UPDATE jobs SET status = 'failed', progress = NULL, payload = NULL, error = ?, "
+                            "updated = ?, finished = ? WHERE id = ? AND status = 'running'",
+                            [(f"Worker lost {attempts} times", now, now, job_id)
+                             for job_id, attempts in lost if attempts >= self.max_attempts])
+        return len(lost)
+
+    def purge(self):
+        """Delete finished jobs older than the TTL; returns how many."""
+        with self._connect() as con:
+            return con.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished < ?",
+                               (time.time() - self.ttl,)).rowcount
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def json_safe(d):
+    """``d`` with NaN values replaced by None, so it serializes as JSON."""
+    return {k: (None if isinstance(v, float) and math.isnan(v) else v) for k, v in d.items()}
+
+def run_pipeline(filename: str, data: bytes, params, progress=lambda stage: None):
+    """Statement bytes -> basics, ratios, benchmark, summary, underwriting memo and optional report."""
+    import pandas as pd
+    from shared.parsing import parse_financials, parse_financials_csv, compute_ratios, benchmark_for
+    from memo import ai_like_summary, underwriting_memo
+
+    progress("read")
+    name = filename.lower()
+    if name.endswith(".csv"):
+        progress("parse")
+        basics, _ = parse_financials_csv(io.BytesIO(data))
+    else:
+        if name.endswith(".pdf"):
+            from parser_pdf import extract_tables_to_long
+            df = extract_tables_to_long(data)
+        else:
+            df = pd.read_excel(io.BytesIO(data), sheet_name=0)
+        progress("parse")
+        basics, _ = parse_financials(df)
+    progress("ratios")
+    ratios = compute_ratios(basics)
+    progress("benchmark")
+    industry = params.get("industry") or "Wholesale Trade"
+    bench = benchmark_for(industry)
+    progress("memo")
+    memo = underwriting_memo(params.get("company") or "Borrower", params.get("fiscal_year") or "", industry,
+                             basics, ratios, bench)
+    result = {"basics": json_safe(basics), "ratios": ratios, "benchmark": bench,
+              "summary": ai_like_summary(ratios), "memo": memo}
+    if params.get("report"):
+        from rendering import render
+        progress("report")
+        body = render(params["report"], params.get("company") or "Borrower", params.get("fiscal_year") or "",
+                      industry, basics, ratios, bench)
+        result["report"] = {"format": params["report"], "base64": base64.b64encode(body).decode("ascii")}
+    return result
+
+@contextmanager
+def _leased(store: JobStore, job_id: str):
+    """Renew the lease on ``job_id`` from a background thread while the block runs."""
+    stop = threading.Event()
+    def beat():
+        while not stop.wait(store.lease / 3):
+            store.heartbeat(job_id)
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+def work(path=JOB_DB, once=False):
+    """Worker loop: claim, run and record jobs until interrupted (or the queue is empty with ``once``)."""
+    store = JobStore(path)
+    last_purge = last_recover = 0.0
+    while True:
+        if time.time() - last_purge > 60:
+            store.purge()
+            last_purge = time.time()
+        if time.time() - last_recover > store.lease / 2:
+            store.recover()
+            last_recover = time.time()
+        job = store.claim()
+        if job is None:
+            if once:
+                return
+            time.sleep(JOB_POLL_SECONDS)
+            continue
+        job_id, filename, data, params = job
+        try:
+            with _leased(store, job_id):
+                result = run_pipeline(filename, data, params, lambda stage: store.progress(job_id, stage))
+        except Exception as e:
+            store.finish(job_id, error=f"{type(e).__name__}: {e}")
+        else:
+            store.finish(job_id, result=result)
+
+class JobWorkers:
+    """A pool of worker processes draining the queue in ``path``."""
+    def __init__(self, workers: int, path=JOB_DB):
+        self.workers = workers
+        self.path = path
+        self.procs = []
+
+    def start(self):
+        JobStore(self.path).recover()
+        ctx = multiprocessing.get_context("spawn")
+        self.procs = [ctx.Process(target=work, args=(self.path,), daemon=True) for _ in range(self.workers)]
+        for p in self.procs:
+            p.start()
+
+    def stop(self, timeout=5):
+        for p in self.procs:
+            p.terminate()
+        for p in self.procs:
+            p.join(timeout)
+        self.procs = []
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Run ClearPass job workers.")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--db", default=JOB_DB)
+    args = ap.parse_args()
+    pool = JobWorkers(args.workers, args.db)
+    pool.start()
+    try:
+        for p in pool.procs:
+            p.join()
+    except KeyboardInterrupt:
+        pool.stop()
@@ -0,0 +1,92 @@
+"""Concurrent-client load test for the ClearPass API.
+
+    python loadtest.py --file sample_public_company_wide.csv --clients 16 --requests 400 --spawn
+"""
+import argparse, os, statistics, subprocess, sys, time, uuid
+import urllib.error, urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+def _multipart(path):
+    boundary = uuid.uuid4().hex
+    with open(path, "rb") as fh:
+        data = fh.read()
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{os.path.basename(path)}\"\r\n"
+            f"Content-Type: application/octet-stream\r\n\r\n").encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+def _post(url, body, content_type):
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": content_type}, method="POST")
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=120) as resp:
+            resp.read()
+            status = resp.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except OSError:
+        status = "error"
+    return time.perf_counter() - start, status
+
+def percentile(values, q):
+    """Nearest-rank ``q``-th percentile of ``values`` (NaN when empty)."""
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+def _wait_for(url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1)
+            return
+        except urllib.error.HTTPError:
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server at {url} did not come up")
+
+def run(url, path, clients, requests):
+    body, content_type = _multipart(path)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(lambda _: _post(url, body, content_type), range(requests)))
+    elapsed = time.perf_counter() - started
+    ok = [t * 1000 for t, status in results if status == 200]
+    return {
+        "requests": requests,
+        "clients": clients,
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(ok, 50), 1),
+        "p90_ms": round(percentile(ok, 90), 1),
+        "p99_ms": round(percentile(ok, 99), 1),
+        "mean_ms": round(statistics.fmean(ok), 1) if ok else None,
+        "status": dict(Counter(str(s) for _, s in results)),
+    }
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--url", default="http://127.0.0.1:8765/analyze")
+    ap.add_argument("--file", default="sample_public_company_wide.csv")
+    ap.add_argument("--clients", type=int, default=16)
+    ap.add_argument("--requests", type=int, default=400)
+    ap.add_argument("--spawn", action="store_true", help="start uvicorn main:app on the --url port")
+    args = ap.parse_args(argv)
+    server = None
+    if args.spawn:
+        port = args.url.split(":")[-1].split("/")[0]
+        server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", port, "--log-level", "warning"])
+        _wait_for(args.url.rsplit("/", 1)[0] + "/docs")
+    try:
+        report = run(args.url, args.file, args.clients, args.requests)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    for k, v in report.items():
+        print(f"{k:>15}: {v}")
+    return report
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,362 @@
-from fastapi import FastAPI, UploadFile, File
-import pandas as pd
-from shared.parsing import parse_financials, compute_ratios
+import asyncio, io, json, multiprocessing, os, zipfile
+from contextlib import asynccontextmanager
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional
+from fastapi import FastAPI, UploadFile, File, Form, Query, HTTPException
+from fastapi.responses import Response, StreamingResponse
+from shared.parsing import parse_financials, parse_records, read_csv_records, compute_ratios, benchmark_for, benchmark_store
+from shared.metrics import count, profiled, prometheus_text, stage
+from result_cache import default_cache, cache_key, content_digest, keyword_map_digest
+from jobs import JobStore, JobWorkers, json_safe
+from rendering import FORMATS, submit_render
+from stress import check_grid, stress_test
 
-app = FastAPI(title="ClearPass API", version="0.1.0")
+JOB_WORKERS = int(os.environ.get("CLEARPASS_JOB_WORKERS", 2))
+JOB_MAX_UPLOAD_MB = float(os.environ.get("CLEARPASS_JOB_MAX_UPLOAD_MB", 200))
+
+_job_store = None
+
+def job_store():
+    global _job_store
+    if _job_store is None:
+        _job_store = JobStore()
+    return _job_store
+
+@asynccontextmanager
+async def lifespan(app):
+    global _batch_pool
+    await asyncio.to_thread(benchmark_store)
+    workers = JobWorkers(JOB_WORKERS, job_store().path) if JOB_WORKERS > 0 else None
+    if workers:
+        workers.start()
+    try:
+        yield
+    finally:
+        if workers:
+            workers.stop()
+        if _batch_pool is not None:
+            _batch_pool.shutdown(wait=False, cancel_futures=True)
+            _batch_pool = None
+
+app = FastAPI(title="ClearPass API", version="0.1.0", lifespan=lifespan)
+
+BATCH_WORKERS = int(os.environ.get("CLEARPASS_BATCH_WORKERS", os.cpu_count() or 1))
+BATCH_MAX_INFLIGHT_MB = float(os.environ.get("CLEARPASS_BATCH_MAX_INFLIGHT_MB", 256))
+ANALYZE_EXECUTOR = os.environ.get("CLEARPASS_ANALYZE_EXECUTOR", "thread")
+ANALYZE_WORKERS = int(os.environ.get("CLEARPASS_ANALYZE_WORKERS", os.cpu_count() or 1))
+ANALYZE_MAX_INFLIGHT = int(os.environ.get("CLEARPASS_ANALYZE_MAX_INFLIGHT", 4 * ANALYZE_WORKERS))
+MAX_UPLOAD_MB = float(os.environ.get("CLEARPASS_MAX_UPLOAD_MB", 25))
+ALLOW_PROFILE = os.environ.get("CLEARPASS_ALLOW_PROFILE", "0") == "1"
+BATCH_MAX_UPLOAD_MB = float(os.environ.get("CLEARPASS_BATCH_MAX_UPLOAD_MB", 2048))
+
+class BodyLimitMiddleware:
+    """Reject request bodies over a per-path byte limit with 413 while they stream in.
+
+    Checked against ``Content-Length`` up front and against the bytes actually
+    received, so chunked uploads are cut off without being spooled in full.
+    """
+    def __init__(self, app, limits):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get("path")) if scope["type"] == "http" else None
+        if limit is None:
+            return await self.app(scope, receive, send)
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > limit:
+            return await self._reject(send, limit)
+        seen = 0
+        exceeded = False
+
+        async def limited_receive():
+            nonlocal seen, exceeded
+            if exceeded:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                seen += len(message.get("body", b""))
+                if seen > limit:
+                    exceeded = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            if not exceeded:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded:
+            await self._reject(send, limit)
+
+    @staticmethod
+    async def _reject(send, limit):
+        body = json.dumps({"detail": f"Upload exceeds {limit / (1024 * 1024):g} MB limit"}).encode()
+        await send({"type": "http.response.start", "status": 413,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+BODY_LIMITS = {
+    "/analyze": int(MAX_UPLOAD_MB * 1024 * 1024),
+    "/analyze/batch": int(BATCH_MAX_UPLOAD_MB * 1024 * 1024),
+    "/jobs": int(JOB_MAX_UPLOAD_MB * 1024 * 1024),
+    "/report": int(MAX_UPLOAD_MB * 1024 * 1024),
+    "/stress": int(MAX_UPLOAD_MB * 1024 * 1024),
+}
+app.add_middleware(BodyLimitMiddleware, limits=BODY_LIMITS)
+
+_analyze_pool = None
+_analyze_inflight = 0
+
+@asynccontextmanager
+async def _analysis_slot():
+    """Hold one of ``ANALYZE_MAX_INFLIGHT`` slots for a CPU-bound request; 503 when none is free."""
+    global _analyze_inflight
+    if _analyze_inflight >= ANALYZE_MAX_INFLIGHT:
+        raise HTTPException(status_code=503, detail="Too many analyses in progress, retry shortly",
+                            headers={"Retry-After": "1"})
+    _analyze_inflight += 1
+    try:
+        yield
+    finally:
+        _analyze_inflight -= 1
+
+def _analyze_executor():
+    """Pool the CPU-bound parse runs in (``CLEARPASS_ANALYZE_EXECUTOR`` = thread | process)."""
+    global _analyze_pool
+    if _analyze_pool is None:
+        cls = ProcessPoolExecutor if ANALYZE_EXECUTOR == "process" else ThreadPoolExecutor
+        _analyze_pool = cls(max_workers=ANALYZE_WORKERS)
+    return _analyze_pool
+
+def _read_table(name: str, fh):
+    import pandas as pd
+    with stage("read"):
+        if name.lower().endswith(".csv"):
+            return pd.read_csv(fh, float_precision="round_trip")
+        return pd.read_excel(fh)
+
+def _analysis(name: str, data: bytes, cached=True):
+    """``(basics, ratios)`` for one uploaded statement, served from the result cache when possible."""
+    def compute():
+        if name.lower().endswith(".csv"):
+            basics, _ = parse_records(*read_csv_records(data))
+        else:
+            count("clearpass_bytes_read_total", len(data), source="excel")
+            basics, _ = parse_financials(_read_table(name, io.BytesIO(data)))
+        return basics, compute_ratios(basics)
+    if not cached:
+        return compute()
+    kind = "analysis:" + ("csv" if name.lower().endswith(".csv") else "excel")
+    return default_cache().get_or_compute(cache_key(kind, content_digest(data), keyword_map_digest()), compute)
+
+def _profiled_analysis(name: str, data: bytes):
+    """``_analysis`` under cProfile, skipping the result cache so the parse itself is captured."""
+    with profiled() as prof:
+        result = _analysis(name, data, cached=False)
+    return result, prof["profile"]
+
+def _analyze_bytes(name: str, data: bytes):
+    """Parse one statement inside a batch worker; errors are reported, not raised."""
+    try:
+        basics, ratios = _analysis(name, data)
+        return {"file": name, "basics": json_safe(basics), "ratios": ratios}
+    except Exception as e:
+        return {"file": name, "error": f"{type(e).__name__}: {e}"}
+
+_batch_pool = None
+
+def _batch_executor():
+    """Process pool shared by all batch requests; spawned so the server's threads are not forked."""
+    global _batch_pool
+    if _batch_pool is None:
+        _batch_pool = ProcessPoolExecutor(max_workers=BATCH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _batch_pool
+
+def _read_capped(fh, limit: int) -> bytes:
+    data = fh.read(limit + 1)
+    if len(data) > limit:
+        raise ValueError(f"statement exceeds the {limit / (1024 * 1024):g} MB in-flight limit")
+    return data
+
+def _read_member(zf, info, limit: int) -> bytes:
+    if info.file_size > limit:
+        raise ValueError(f"statement exceeds the {limit / (1024 * 1024):g} MB in-flight limit")
+    with zf.open(info) as fh:
+        return _read_capped(fh, limit)
+
+def _raise(e):
+    raise e
+
+async def _batch_members(files: List[UploadFile], limit: int):
+    """Yield ``(name, size_hint, read)`` for every statement, expanding zip archives.
+
+    ``read`` is blocking (run it off the loop) and refuses statements over ``limit`` bytes.
+    """
+    for f in files:
+        if not f.filename.lower().endswith(".zip"):
+            yield f.filename, min(f.size or 0, limit), partial(_read_capped, f.file, limit)
+            continue
+        try:
+            zf = await asyncio.to_thread(zipfile.ZipFile, f.file)
+        except zipfile.BadZipFile as e:
+            yield f.filename, 0, partial(_raise, e)
+            continue
+        with zf:
+            for info in zf.infolist():
+                if info.is_dir() or info.filename.startswith("__MACOSX/"):
+                    continue
+                yield info.filename, min(info.file_size, limit), partial(_read_member, zf, info, limit)
+
+async def _run_batch(files: List[UploadFile], workers: int, max_inflight: int):
+    loop = asyncio.get_running_loop()
+    pool = _batch_executor()
+    pending = {}
+    inflight = 0
+
+    def finish(fut):
+        nonlocal inflight
+        name, size = pending.pop(fut)
+        inflight -= size
+        try:
+            res = fut.result()
+        except Exception as e:
+            res = {"file": name, "error": f"{type(e).__name__}: {e}"}
+        return json.dumps(res) + "\n"
+
+    try:
+        async for name, size, read in _batch_members(files, max_inflight):
+            # Backpressure: keep queued bytes under the cap and the queue near the pool size.
+            while pending and (inflight + size > max_inflight or len(pending) >= 2 * workers):
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for fut in done:
+                    yield finish(fut)
+            try:
+                data = await asyncio.to_thread(read)
+            except Exception as e:
+                yield json.dumps({"file": name, "error": f"{type(e).__name__}: {e}"}) + "\n"
+                continue
+            fut = loop.run_in_executor(pool, _analyze_bytes, name, data)
+            pending[fut] = (name, len(data))
+            inflight += len(data)
+            del data
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for fut in done:
+                yield finish(fut)
+    finally:
+        for fut in pending:
+            fut.cancel()
 
 @app.post("/analyze")
-async def analyze(file: UploadFile = File(...)):
-    if file.filename.lower().endswith(".csv"):
-        df = pd.read_csv(file.file)
-    else:
-        df = pd.read_excel(file.file)
-    basics, _ = parse_financials(df)
-    ratios = compute_ratios(basics)
-    return {"basics": basics, "ratios": ratios}
+async def analyze(file: UploadFile = File(...), profile: bool = Query(False)):
+    """Parse one statement off the event loop; 503 when too many analyses are already running.
+
+    ``?profile=true`` (allowed when ``CLEARPASS_ALLOW_PROFILE=1``) bypasses the
+    result cache and adds a cProfile report of the parse as ``profile``.
+    """
+    if profile and not ALLOW_PROFILE:
+        raise HTTPException(status_code=403, detail="Profiling is disabled (set CLEARPASS_ALLOW_PROFILE=1)")
+    async with _analysis_slot():
+        data = await file.read()
+        loop = asyncio.get_running_loop()
+        if profile:
+            (basics, ratios), report = await loop.run_in_executor(_analyze_executor(), _profiled_analysis,
+                                                                  file.filename, data)
+            return {"basics": json_safe(basics), "ratios": ratios, "profile": report}
+        basics, ratios = await loop.run_in_executor(_analyze_executor(), _analysis, file.filename, data)
+    return {"basics": json_safe(basics), "ratios": ratios}
+
+@app.get("/metrics")
+async def metrics():
+    """Stage timings and pipeline counters of this API process, in Prometheus text format."""
+    return Response(prometheus_text(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return default_cache().stats
+
+@app.post("/analyze/batch")
+async def analyze_batch(files: List[UploadFile] = File(...),
+                        workers: Optional[int] = Query(None, ge=1, le=64),
+                        max_inflight_mb: Optional[float] = Query(None, gt=0)):
+    """Score many statements (CSV/XLSX files or zip archives of them) in a process pool.
+
+    Streams NDJSON, one line per statement; a failing statement yields ``{"file", "error"}``.
+    """
+    workers = min(workers or BATCH_WORKERS, BATCH_WORKERS)
+    max_inflight = int((max_inflight_mb or BATCH_MAX_INFLIGHT_MB) * 1024 * 1024)
+    return StreamingResponse(_run_batch(files, workers, max_inflight), media_type="application/x-ndjson")
+
+@app.post("/report")
+async def report(file: UploadFile = File(...), company: str = Form("Borrower"), fiscal_year: str = Form(""),
+                 industry: str = Form("Wholesale Trade"), format: str = Form("pdf")):
+    """Underwriting report (``pdf``) or memo (``docx``) for one CSV/XLSX statement."""
+    if format not in FORMATS:
+        raise HTTPException(status_code=422, detail=f"format must be one of {sorted(FORMATS)}")
+    async with _analysis_slot():
+        data = await file.read()
+        loop = asyncio.get_running_loop()
+        basics, ratios = await loop.run_in_executor(_analyze_executor(), _analysis, file.filename, data)
+        fut = submit_render(format, company, fiscal_year, industry, basics, ratios, benchmark_for(industry))
+        body = await asyncio.wrap_future(fut)
+    filename = f"{company}_Underwriting_{'Report' if format == 'pdf' else 'Memo'}.{format}"
+    return Response(body, media_type=FORMATS[format],
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+def _stress_grid(grid: Optional[str]):
+    """``{"shock": [values]}`` or ``{"shock": {"start", "stop", "num"}}`` JSON -> value lists.
+
+    Axis sizes are checked before any range is expanded.
+    """
+    if not grid:
+        return None
+    try:
+        spec = json.loads(grid)
+        sizes = {k: len(v) if isinstance(v, list) else int(v["num"]) for k, v in spec.items()}
+        check_grid(sizes)
+        return {k: (v if isinstance(v, list) else
+                    [v["start"] + (v["stop"] - v["start"]) * i / max(sizes[k] - 1, 1) for i in range(sizes[k])])
+                for k, v in spec.items()}
+    except (ValueError, TypeError, KeyError, AttributeError) as e:
+        raise HTTPException(status_code=422, detail=f"invalid grid: {e}")
+
+@app.post("/stress")
+async def stress(file: UploadFile = File(...), grid: Optional[str] = Form(None), tax_rate: float = Form(0.0)):
+    """Stress-test one statement over a grid of shocks (see ``_stress_grid``) against the memo thresholds."""
+    axes = _stress_grid(grid)
+    async with _analysis_slot():
+        data = await file.read()
+        loop = asyncio.get_running_loop()
+        basics, _ = await loop.run_in_executor(_analyze_executor(), _analysis, file.filename, data)
+        try:
+            return await loop.run_in_executor(_analyze_executor(), partial(stress_test, basics, axes, tax_rate=tax_rate))
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+
+@app.post("/jobs", status_code=202)
+async def create_job(file: UploadFile = File(...), company: str = Form("Borrower"),
+                     fiscal_year: str = Form(""), industry: str = Form("Wholesale Trade"),
+                     report: Optional[str] = Form(None)):
+    """Queue a full analysis (PDF/CSV/XLSX -> basics, ratios, memo); poll ``GET /jobs/{id}``.
+
+    ``report`` (``pdf`` or ``docx``) also renders the document into the result, base64-encoded.
+    """
+    if report is not None and report not in FORMATS:
+        raise HTTPException(status_code=422, detail=f"report must be one of {sorted(FORMATS)}")
+    data = await file.read()
+    params = {"company": company, "fiscal_year": fiscal_year, "industry": industry, "report": report}
+    job_id = await asyncio.to_thread(job_store().submit, file.filename, data, params)
+    return {"id": job_id, "status": "queued"}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await asyncio.to_thread(job_store().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job")
+    return job
@@ -0,0 +1,61 @@
+import numpy as np
+
+def ai_like_summary(ratios):
+    def strength(val, good, ok, inverse=False):
+        if val is None or (isinstance(val,float) and np.isnan(val)): return 'n/a'
+        if inverse:
+            if val <= good: return 'strong'
+            if val <= ok: return 'acceptable'
+            return 'elevated'
+        else:
+            if val >= good: return 'strong'
+            if val >= ok: return 'acceptable'
+            return 'weak'
+    cr = ratios.get('Current Ratio'); qr = ratios.get('Quick Ratio')
+    de = ratios.get('Debt-to-Equity'); pm = ratios.get('Profit Margin (%)'); roa = ratios.get('Return on Assets (%)')
+    cov = ratios.get('Interest Coverage (EBIT)') or ratios.get('Interest Coverage (EBITDA)')
+    dscr = ratios.get('DSCR (CFO / Debt Service)')
+    lines = []
+    lines.append(f"Liquidity — Current {cr}, Quick {qr}. Position appears {strength(cr,1.8,1.2)}.")
+    lines.append(f"Leverage — D/E {de}. Leverage is {strength(de,0.8,1.5,inverse=True)}.")
+    lines.append(f"Profitability — Margin {pm}% and ROA {roa}%. Profitability is {strength(pm,12,6)} relative to medians.")
+    if cov is not None: lines.append(f"Coverage — Interest coverage ≈ {cov}x ({'adequate' if cov>=3 else 'tight'}).")
+    if dscr is not None: lines.append(f"DSCR — {dscr}x; ≥1.25x preferred for term debt.")
+    return "\n".join(lines)
+
+def underwriting_memo(company, year, industry, basics, ratios, bench):
+    def fmt(v, pct=False):
+        if v is None or (isinstance(v,float) and np.isnan(v)): return "n/a"
+        return f"{v:,.2f}%" if pct else f"{v:,.0f}"
+    def rfmt(v): 
+        if v is None or (isinstance(v,float) and np.isnan(v)): return "n/a"
+        return f"{v:,.2f}"
+    lines = []
+    lines += [f"Underwriting Memo — {company} (FY {year})", f"Industry: {industry}", "—"*60]
+    lines += ["Executive Summary"]
+    lines += [
+        f"Liquidity: Current {rfmt(ratios.get('Current Ratio'))} (bench {bench['Current Ratio']}), "
+        f"Quick {rfmt(ratios.get('Quick Ratio'))} (bench {bench['Quick Ratio']}).",
+        f"Leverage: D/E {rfmt(ratios.get('Debt-to-Equity'))} (bench {bench['Debt-to-Equity']}).",
+        f"Profitability: Margin {rfmt(ratios.get('Profit Margin (%)'))}% (bench {bench['Profit Margin (%)']}%), "
+        f"ROA {rfmt(ratios.get('Return on Assets (%)'))}% (bench {bench['Return on Assets (%)']}%).",
+        f"Coverage: Interest coverage ≈ {rfmt(ratios.get('Interest Coverage (EBIT)') or ratios.get('Interest Coverage (EBITDA)'))}x "
+        f"(target ≥3x). DSCR {rfmt(ratios.get('DSCR (CFO / Debt Service)'))}x (preferred ≥1.25x)."
+    ]
+    lines += ["", "Financial Snapshot"]
+    for k in ["Revenue","COGS","Operating Expenses","EBIT","EBITDA","Net Income","Cash","Accounts Receivable","Inventory",
+              "Current Assets","Current Liabilities","Total Liabilities","Equity","Total Assets","CFO","Interest Expense","Interest Paid","Principal Repayment"]:
+        lines.append(f"{k}: {fmt(basics.get(k), pct=False)}")
+    lines += ["", "Key Risks",
+              "- Working capital strain if AR extends or inventory turns slow.",
+              "- Margin pressure in downturn or input cost shock.",
+              "- Exposure to rising rates on floating debt.",
+              "", "Mitigants",
+              "- Positive CFO / acceptable coverage.",
+              "- Cost flexibility in SG&A.",
+              "- Leverage within/near sector medians.",
+              "", "Indicative Decision Framework",
+              "• Approve if: D/E ≤ 1.5x, Interest coverage ≥ 3x, Current ratio ≥ 1.2x, DSCR ≥ 1.25x.",
+              "• Approve with conditions/LOC if marginal on one dimension.",
+              "• Decline/collateralize if: coverage <2x or DSCR <1.0x."]
+    return "\n".join(lines)
@@ -0,0 +1,198 @@
+"""Stage timers, counters and Prometheus text exposition for the parsing pipeline.
+
+``stage()`` / ``@timed`` and ``count()`` cost one flag check with metrics off
+(``CLEARPASS_METRICS=0``); ``collect()`` records a per-run ``Trace``.
+"""
+import cProfile
+import contextvars
+import functools
+import io
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+HELP = {
+    "clearpass_stage_seconds": "Wall time spent in each pipeline stage.",
+    "clearpass_rows_total": "Statement rows processed.",
+    "clearpass_patterns_evaluated_total": "Keyword patterns evaluated (newly seen labels x patterns).",
+    "clearpass_unmatched_labels_total": "Rows whose account label matched no category.",
+    "clearpass_bytes_read_total": "Input bytes read.",
+    "clearpass_pages_total": "PDF pages processed.",
+}
+
+_enabled = os.environ.get("CLEARPASS_METRICS", "1") != "0"
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_trace = contextvars.ContextVar("clearpass_trace", default=None)
+_profile_lock = threading.Lock()
+
+def enable(flag=True):
+    global _enabled
+    _enabled = bool(flag)
+
+def enabled() -> bool:
+    return _enabled
+
+class Trace:
+    """Stage timings (``{stage: [calls, seconds]}``) and counters for one run."""
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+
+    def rows(self):
+        """``[{"stage", "calls", "ms"}]``, slowest first."""
+        return sorted(({"stage": k, "calls": n, "ms": round(s * 1000, 2)} for k, (n, s) in self.stages.items()),
+                      key=lambda r: -r["ms"])
+
+def _key(labels):
+    return tuple(sorted(labels.items()))
+
+def observe(name: str, seconds: float):
+    """Record one timing of stage ``name``."""
+    i = 0
+    while i < len(BUCKETS) and seconds > BUCKETS[i]:
+        i += 1
+    with _lock:
+        h = _histograms.get(name)
+        if h is None:
+            h = _histograms[name] = [0] * (len(BUCKETS) + 1) + [0.0]
+        h[i] += 1
+        h[-1] += seconds
+    trace = _trace.get()
+    if trace is not None:
+        calls, total = trace.stages.get(name, (0, 0.0))
+        trace.stages[name] = [calls + 1, total + seconds]
+
+def count(name: str, n=1, **labels):
+    """Add ``n`` to counter ``name`` with the given labels."""
+    if not _enabled:
+        return
+    key = (name, _key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + n
+    trace = _trace.get()
+    if trace is not None:
+        label = name + "".join(f" {k}={v}" for k, v in key[1])
+        trace.counters[label] = trace.counters.get(label, 0) + n
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start)
+        return False
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NO_STAGE = _NoStage()
+
+def stage(name: str):
+    """Context manager timing a block as stage ``name``."""
+    return _Stage(name) if _enabled else _NO_STAGE
+
+def timed(name: str):
+    """Decorator timing every call of a function as stage ``name``."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Stage(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+@contextmanager
+def collect(trace=None):
+    """Record stages and counters of the enclosed block on ``trace`` (a new ``Trace`` by default)."""
+    trace = trace if trace is not None else Trace()
+    token = _trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+
+@contextmanager
+def profiled(enabled=True, sort="cumulative", limit=40):
+    """cProfile the enclosed block; the report text is in ``result["profile"]`` afterwards.
+
+    Only one block is profiled at a time; a concurrent request gets a note instead.
+    """
+    result = {}
+    if not enabled:
+        yield result
+        return
+    if not _profile_lock.acquire(blocking=False):
+        result["profile"] = "profiler busy with another request; try again"
+        yield result
+        return
+    prof = cProfile.Profile()
+    try:
+        prof.enable()
+        try:
+            yield result
+        finally:
+            prof.disable()
+            buf = io.StringIO()
+            pstats.Stats(prof, stream=buf).sort_stats(sort).print_stats(limit)
+            result["profile"] = buf.getvalue()
+    finally:
+        _profile_lock.release()
+
+def snapshot():
+    """``{"stages": {stage: {"count", "seconds"}}, "counters": {(name, labels): value}}`` for this process."""
+    with _lock:
+        stages = {k: {"count": sum(h[:-1]), "seconds": h[-1]} for k, h in _histograms.items()}
+        counters = dict(_counters)
+    return {"stages": stages, "counters": counters}
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+def _labels(pairs):
+    return "{" + ",".join(f'{k}="{str(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+def prometheus_text() -> str:
+    """The registry in Prometheus text exposition format (version 0.0.4)."""
+    with _lock:
+        histograms = {k: list(h) for k, h in _histograms.items()}
+        counters = dict(_counters)
+    lines = []
+    if histograms:
+        name = "clearpass_stage_seconds"
+        lines += [f"# HELP {name} {HELP[name]}", f"# TYPE {name} histogram"]
+        for stage_name in sorted(histograms):
+            h = histograms[stage_name]
+            cumulative = 0
+            for le, n in zip([*(f"{b:g}" for b in BUCKETS), "+Inf"], h[:-1]):
+                cumulative += n
+                lines.append(f'{name}_bucket{{stage="{stage_name}",le="{le}"}} {cumulative}')
+            lines.append(f'{name}_sum{{stage="{stage_name}"}} {h[-1]:.6f}')
+            lines.append(f'{name}_count{{stage="{stage_name}"}} {cumulative}')
+    for name in sorted({n for n, _ in counters}):
+        lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} counter"]
+        for (n, labels), value in sorted(counters.items()):
+            if n == name:
+                lines.append(f"{name}{_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
@@ -1,21 +1,306 @@
-import pdfplumber
-import pandas as pd
+import hashlib
+import io
+import multiprocessing
+import os
+import pickle
 import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from shared.parsing import classifier_for, _norm
+from shared.metrics import count, stage
+
+PAGE_CACHE_SIZE = int(os.environ.get("CLEARPASS_PDF_PAGE_CACHE", 2048))
+PAGE_CACHE_DIR = os.environ.get("CLEARPASS_PDF_CACHE_DIR")
+PDF_WORKERS = int(os.environ.get("CLEARPASS_PDF_WORKERS", 1))
+
+STATEMENT_HEADINGS = {
+    'balance_sheet': [r'\bbalance sheets?\b', r'\bstatements? of (consolidated )?financial (position|condition)\b'],
+    'income_statement': [r'\bincome statements?\b', r'\bprofit and loss\b', r'\bstatements? of profit or loss\b',
+                         r'\bstatements? of (consolidated )?(operations|income|earnings|comprehensive income)\b'],
+    'cash_flow': [r'\bstatements? of (consolidated )?cash flows?\b', r'\bcash flows? statements?\b'],
+    'equity': [r"\bstatements? of (changes in )?(stockholders'|shareholders'|owners'?) equity\b", r'\bstatements? of changes in equity\b'],
+}
+# Which statement a default_keywords() category usually lives on, for pages without a heading.
+CATEGORY_STATEMENT = {
+    'current_assets':'balance_sheet', 'cash':'balance_sheet', 'accounts_receivable':'balance_sheet', 'inventory':'balance_sheet',
+    'current_liabilities':'balance_sheet', 'total_liabilities':'balance_sheet', 'equity':'balance_sheet', 'total_assets':'balance_sheet',
+    'short_term_debt':'balance_sheet', 'long_term_debt':'balance_sheet', 'accounts_payable':'balance_sheet',
+    'revenue':'income_statement', 'cogs':'income_statement', 'operating_expenses':'income_statement', 'ebit':'income_statement',
+    'ebitda':'income_statement', 'interest_expense':'income_statement', 'net_income':'income_statement',
+    'cfo':'cash_flow', 'interest_paid':'cash_flow', 'principal_repayment':'cash_flow',
+}
+HEADING_LINES = 10
+MIN_KEYWORD_LINES = 3
+
+_page_cache = OrderedDict()
+
+def _read_bytes(file_like) -> bytes:
+    if isinstance(file_like, (bytes, bytearray)):
+        return bytes(file_like)
+    if isinstance(file_like, (str, os.PathLike)):
+        with open(file_like, "rb") as fh:
+            return fh.read()
+    if hasattr(file_like, "getvalue"):
+        return file_like.getvalue()
+    if hasattr(file_like, "seek"):
+        file_like.seek(0)
+    return file_like.read()
+
+def _open_pdf(data: bytes):
+    import pdfplumber
+    return pdfplumber.open(io.BytesIO(data))
+
+def file_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def _cache_path(key):
+    return os.path.join(PAGE_CACHE_DIR, "_".join(str(k) for k in key) + ".pkl")
 
-def extract_tables_to_long(file_like) -> pd.DataFrame:
+def _cache_get(key):
+    if key in _page_cache:
+        _page_cache.move_to_end(key)
+        return _page_cache[key]
+    if PAGE_CACHE_DIR:
+        try:
+            with open(_cache_path(key), "rb") as fh:
+                tables = pickle.load(fh)
+        except (OSError, pickle.PickleError, EOFError):
+            return None
+        _cache_put(key, tables, disk=False)
+        return tables
+    return None
+
+def _cache_put(key, tables, disk=True):
+    _page_cache[key] = tables
+    _page_cache.move_to_end(key)
+    while len(_page_cache) > PAGE_CACHE_SIZE:
+        _page_cache.popitem(last=False)
+    if disk and PAGE_CACHE_DIR:
+        os.makedirs(PAGE_CACHE_DIR, exist_ok=True)
+        tmp = _cache_path(key) + f".{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            pickle.dump(tables, fh)
+        os.replace(tmp, _cache_path(key))
+
+def clear_page_cache():
+    _page_cache.clear()
+
+def _table_rows(tables):
     rows = []
-    with pdfplumber.open(file_like) as pdf:
-        for page in pdf.pages:
-            tables = page.extract_tables() or []
-            for table in tables:
-                for row in table:
-                    if not row or len(row) < 2:
-                        continue
-                    account = str(row[0]).strip()
-                    value = str(row[1]).strip()
-                    if account and re.search(r"[A-Za-z]", account) and re.search(r"[-\d,()]", value):
-                        rows.append((account, value))
+    for table in tables:
+        for row in table:
+            if not row or len(row) < 2:
+                continue
+            account = str(row[0]).strip()
+            value = str(row[1]).strip()
+            if account and re.search(r"[A-Za-z]", account) and re.search(r"[-\d,()]", value):
+                rows.append((account, value))
+    return rows
+
+def _cached(digest, i, kind, cache, compute):
+    key = (digest, i, kind)
+    value = _cache_get(key) if cache else None
+    if value is None:
+        with stage(f"pdf_{kind}"):
+            value = compute()
+        count("clearpass_pages_total", kind=kind)
+        if cache:
+            _cache_put(key, value)
+    return value
+
+def _page_lines(page):
+    return [line for line in (page.extract_text() or "").splitlines() if line.strip()]
+
+def _classify_page(i, lines, clf):
+    statement, heading = None, False
+    top = [_norm(line) for line in lines[:HEADING_LINES]]
+    for name, pats in STATEMENT_HEADINGS.items():
+        if any(re.search(p, line) for p in pats for line in top):
+            statement, heading = name, True
+            break
+    votes = {}
+    hits = 0
+    for line in lines:
+        cats = [k for k, hit in zip(clf.categories, clf.classify(_norm(line))) if hit]
+        if cats:
+            hits += 1
+            for k in cats:
+                if k in CATEGORY_STATEMENT:
+                    votes[CATEGORY_STATEMENT[k]] = votes.get(CATEGORY_STATEMENT[k], 0) + 1
+    candidate = (heading and hits > 0) or hits >= MIN_KEYWORD_LINES
+    if statement is None and candidate:
+        statement = max(votes, key=votes.get) if votes else None
+    return {'page': i, 'statement': statement, 'heading': heading, 'keyword_lines': hits, 'candidate': candidate}
+
+def locate_statement_pages(file_like, kw_map=None, cache=True):
+    """Cheap text-layer pass: per page, the detected ``statement``, ``heading``, ``keyword_lines`` and ``candidate`` flag."""
+    data = _read_bytes(file_like)
+    digest = file_digest(data)
+    clf = classifier_for(kw_map)
+    with _open_pdf(data) as pdf:
+        return [_classify_page(i, _cached(digest, i, "text", cache, lambda: _page_lines(page)), clf)
+                for i, page in enumerate(pdf.pages)]
+
+def _page_scan(digest, i, page, clf, locate, cache):
+    """``(lines, info, tables)`` for one open page; no tables when the locator skips it.
+
+    Text and tables come from the same ``page`` object, so pdfplumber parses
+    its characters once for both.
+    """
+    lines = None
+    if locate:
+        lines = _cached(digest, i, "text", cache, lambda: _page_lines(page))
+        info = _classify_page(i, lines, clf)
+    else:
+        info = {'page': i, 'statement': None, 'candidate': True}
+    tables = _cached(digest, i, "tables", cache, lambda: page.extract_tables() or []) if info['candidate'] else None
+    return lines, info, tables
+
+def _scan_page_range(data: bytes, digest, pages, kw_map, locate):
+    """``_page_scan`` for ``pages`` without caching; runs in pool workers."""
+    clf = classifier_for(kw_map)
+    with _open_pdf(data) as pdf:
+        return [_page_scan(digest, i, pdf.pages[i], clf, locate, cache=False) for i in pages]
+
+def iter_page_tables(file_like, cache=True, pages=None):
+    """Yield ``(page_number, tables)`` one page at a time, reusing cached pages.
+
+    ``pages`` restricts extraction to those page numbers (e.g. the candidates
+    from ``locate_statement_pages``).
+    """
+    data = _read_bytes(file_like)
+    digest = file_digest(data)
+    wanted = None if pages is None else set(pages)
+    with _open_pdf(data) as pdf:
+        for i, page in enumerate(pdf.pages):
+            if wanted is not None and i not in wanted:
+                continue
+            yield i, _cached(digest, i, "tables", cache, lambda: page.extract_tables() or [])
+
+def iter_page_rows(file_like, cache=True, pages=None):
+    """Streaming extraction: yield ``(page_number, [(account, value), ...])`` per page."""
+    for i, tables in iter_page_tables(file_like, cache=cache, pages=pages):
+        yield i, _table_rows(tables)
+
+_pool = None
+
+def _executor(workers: int):
+    """Spawned process pool reused across calls; rebuilt when ``workers`` changes."""
+    global _pool
+    if _pool is None or _pool[0] != workers:
+        if _pool is not None:
+            _pool[1].shutdown(wait=False)
+        _pool = (workers, ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")))
+    return _pool[1]
+
+def _parallel_scan(data: bytes, digest, workers: int, clf, kw_map, locate, cache):
+    """``{page_number: (info, tables)}`` for every page, scanning uncached ones in a pool."""
+    with _open_pdf(data) as pdf:
+        n_pages = len(pdf.pages)
+    out, missing = {}, []
+    for i in range(n_pages):
+        info = {'page': i, 'statement': None, 'candidate': True}
+        if locate:
+            lines = _cache_get((digest, i, "text")) if cache else None
+            info = None if lines is None else _classify_page(i, lines, clf)
+        tables = _cache_get((digest, i, "tables")) if cache and info and info['candidate'] else None
+        if info is not None and (tables is not None or not info['candidate']):
+            out[i] = (info, tables)
+        else:
+            missing.append(i)
+    if missing:
+        chunk = max(1, -(-len(missing) // (workers * 2)))
+        chunks = [missing[j:j + chunk] for j in range(0, len(missing), chunk)]
+        pool = _executor(workers)
+        with stage("pdf_tables"):
+            futures = [(c, pool.submit(_scan_page_range, data, digest, c, kw_map, locate)) for c in chunks]
+            for c, fut in futures:
+                for i, (lines, info, tables) in zip(c, fut.result()):
+                    out[i] = (info, tables)
+                    for kind, value in (("text", lines), ("tables", tables)):
+                        if value is not None:
+                            count("clearpass_pages_total", kind=kind)
+                            if cache:
+                                _cache_put((digest, i, kind), value)
+    return out
+
+def _page_tables(file_like, workers=None, cache=True, locate=False, kw_map=None):
+    """Yield ``(page_info, tables)`` in page order for candidate (or all) pages."""
+    data = _read_bytes(file_like)
+    digest = file_digest(data)
+    clf = classifier_for(kw_map)
+    if workers and workers > 1:
+        found = _parallel_scan(data, digest, workers, clf, kw_map, locate, cache)
+        scanned = (found[i] for i in sorted(found))
+    else:
+        scanned = ((info, tables) for _, info, tables in _scan_pages(data, digest, clf, locate, cache))
+    for info, tables in scanned:
+        if tables is not None:
+            yield info, tables
+
+def _scan_pages(data, digest, clf, locate, cache):
+    with _open_pdf(data) as pdf:
+        for i, page in enumerate(pdf.pages):
+            yield _page_scan(digest, i, page, clf, locate, cache)
+
+_PERIOD = re.compile(r"(?:fy\s*)?(20\d\d)|fy\s*'?(\d\d)", re.I)
+
+def _period_name(cell: str):
+    """``2024`` for ``2024`` / ``FY 2024``, ``FY23`` for ``FY23``; None unless the whole cell is a period."""
+    m = _PERIOD.fullmatch(cell)
+    if not m:
+        return None
+    return m.group(1) or f"FY{m.group(2)}"
+
+def _wide_rows(info, tables):
+    """Rows keeping every cell; columns are named from a year header row when the table has one."""
+    for table in tables:
+        header = None
+        for row in table:
+            if not row:
+                continue
+            cells = ["" if c is None else str(c).strip() for c in row]
+            names = {j: _period_name(c) for j, c in enumerate(cells) if j and c}
+            periods = {j: n for j, n in names.items() if n}
+            if periods and 2 * len(periods) > len(names):
+                header = periods
+                continue
+            account = cells[0]
+            if not (account and re.search(r"[A-Za-z]", account)):
+                continue
+            values = {}
+            for j, c in enumerate(cells[1:], start=1):
+                if c and re.search(r"\d", c) and re.fullmatch(r"[-\d,.()$€£%\s]+", c):
+                    values[header.get(j, f"Col {j}") if header else f"Col {j}"] = c
+            if values:
+                yield {'Account': account, **values, 'Page': info['page'], 'Statement': info['statement']}
+
+def extract_tables_to_long(file_like, workers=None, cache=True, locate=False, kw_map=None) -> pd.DataFrame:
+    """Extract ``Account``/``Value`` rows from the tables in a PDF.
+
+    ``locate`` skips pages the locator rejects; ``workers > 1`` uses a process pool. Pages are cached.
+    """
+    data = _read_bytes(file_like)
+    count("clearpass_bytes_read_total", len(data), source="pdf")
+    rows = [r for _, tables in _page_tables(data, workers, cache, locate, kw_map) for r in _table_rows(tables)]
+    count("clearpass_rows_total", len(rows), stage="pdf")
     df = pd.DataFrame(rows, columns=["Account","Value"]).dropna()
     if df.empty:
         return pd.DataFrame({"Account":[], "Value":[]})
     return df
+
+def extract_tables_to_wide(file_like, workers=None, cache=True, locate=False, kw_map=None) -> pd.DataFrame:
+    """Like ``extract_tables_to_long`` but keeps every value column, named by year header.
+
+    ``Page`` and ``Statement`` record where each row came from.
+    """
+    data = _read_bytes(file_like)
+    count("clearpass_bytes_read_total", len(data), source="pdf")
+    rows = [r for info, tables in _page_tables(data, workers, cache, locate, kw_map) for r in _wide_rows(info, tables)]
+    count("clearpass_rows_total", len(rows), stage="pdf")
+    if not rows:
+        return pd.DataFrame({"Account":[], "Page":[], "Statement":[]})
+    df = pd.DataFrame(rows)
+    values = [c for c in df.columns if c not in ("Account", "Page", "Statement")]
+    return df[["Account", *values, "Page", "Statement"]]
@@ -1,9 +1,24 @@
+"""Statement parsing, ratio and benchmark core.
+
+pandas is imported lazily, so the list / NumPy core can serve CSV requests without it.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import math
+import os
 import re
-import pandas as pd
 import numpy as np
-from typing import Dict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict
+
+from shared.metrics import count, enabled as metrics_enabled, stage, timed
 
-BENCHMARKS = pd.DataFrame([
+if TYPE_CHECKING:
+    import pandas as pd
+
+_BENCHMARK_ROWS = [
     (311,'Food Manufacturing',1.5,1.2,1.2,8.0,6.0),
     (423,'Wholesale Trade',1.6,1.3,1.0,6.0,5.0),
     (424,'Merchant Wholesalers',1.6,1.3,1.0,6.0,5.0),
@@ -13,7 +28,19 @@ BENCHMARKS = pd.DataFrame([
     (52,'Financial Services',1.5,1.3,1.5,10.0,8.0),
     (54,'Professional Services',1.8,1.6,0.8,12.0,10.0),
     (31,'Manufacturing (General)',1.5,1.2,1.2,8.0,6.0),
-], columns=['naics','industry_name','current_ratio_median','quick_ratio_median','d_to_e_median','profit_margin_median','roa_median'])
+]
+_BENCHMARK_FIELDS = ['naics','industry_name','current_ratio_median','quick_ratio_median','d_to_e_median','profit_margin_median','roa_median']
+
+@lru_cache(maxsize=1)
+def _benchmarks():
+    import pandas as pd
+    return pd.DataFrame(_BENCHMARK_ROWS, columns=_BENCHMARK_FIELDS)
+
+def __getattr__(name):
+    # BENCHMARKS is built on first access so importing this module does not import pandas.
+    if name == "BENCHMARKS":
+        return _benchmarks()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def default_keywords():
     return {
@@ -43,43 +70,357 @@ def default_keywords():
 def _norm(s: str) -> str:
     return re.sub(r"\s+", " ", str(s).strip().lower())
 
+class _Unroutable(Exception):
+    pass
+
+_QUANTIFIER = re.compile(r"[?*+]|\{(\d*)(?:,\d*)?\}")
+_FLAGS = re.compile(r"\(\?([aLmsux]*)(?:-[msx]*)?([:)])")
+
+def _pattern_literals(pattern: str):
+    """Literals one of which every match of ``pattern`` contains; None for anything not understood."""
+    try:
+        alts, end = _alternatives(pattern, 0)
+    except (_Unroutable, IndexError):
+        return None
+    return alts if end == len(pattern) else None
+
+def _alternatives(p, i):
+    branches = []
+    while True:
+        lits, i = _sequence(p, i)
+        branches.append(lits)
+        if i < len(p) and p[i] == "|":
+            i += 1
+            continue
+        if any(b is None for b in branches):
+            return None, i
+        return frozenset().union(*branches), i
+
+def _sequence(p, i):
+    best, run = None, ""
+    def consider(alts):
+        nonlocal best
+        if alts and all(alts) and (best is None or
+                                   (min(map(len, alts)), -len(alts)) > (min(map(len, best)), -len(best))):
+            best = alts
+    while i < len(p) and p[i] not in "|)":
+        (kind, val), i = _atom(p, i)
+        m = _QUANTIFIER.match(p, i)
+        low = None
+        if m:
+            low = 0 if m.group() in "?*" else 1 if m.group() == "+" else int(m.group(1) or 0)
+            i = m.end() + (m.end() < len(p) and p[m.end()] in "?+")
+        if low is None and kind == "char":
+            run += val
+            continue
+        if low is None and kind == "zero":
+            continue
+        consider(frozenset([run]))
+        run = ""
+        if kind in ("char", "group") and (low is None or low >= 1):
+            consider(frozenset([val]) if kind == "char" else val)
+    consider(frozenset([run]))
+    return best, i
+
+def _atom(p, i):
+    """``((kind, value), next_i)`` with kind char, zero (width), group or other."""
+    c = p[i]
+    if c == "\\":
+        e = p[i + 1]
+        if e in "bBAZ":
+            return ("zero", None), i + 2
+        if e in "dDsSwW":
+            return ("other", None), i + 2
+        if e.isalnum() or e == "_":
+            raise _Unroutable(p)
+        return ("char", e), i + 2
+    if c == "[":
+        j = i + 1 + (p[i + 1] == "^")
+        j += p[j] == "]"
+        while p[j] != "]":
+            j += 2 if p[j] == "\\" else 1
+        return ("other", None), j + 1
+    if c == "(":
+        kind, start = "group", i + 1
+        if p.startswith("(?", i):
+            if p.startswith(("(?:", "(?>"), i):
+                start = i + 3
+            elif p.startswith("(?P<", i):
+                start = p.index(">", i) + 1
+            elif p.startswith(("(?=", "(?!"), i):
+                kind, start = "zero", i + 3
+            elif p.startswith(("(?<=", "(?<!"), i):
+                kind, start = "zero", i + 4
+            elif p.startswith(("(?P=", "(?#"), i):
+                return ("other", None), p.index(")", i) + 1
+            else:
+                m = _FLAGS.match(p, i)
+                if not m or "x" in m.group(1):
+                    raise _Unroutable(p)
+                if m.group(2) == ")":
+                    return ("zero", None), m.end()
+                start = m.end()
+        alts, j = _alternatives(p, start)
+        if p[j] != ")":
+            raise _Unroutable(p)
+        return (kind, alts if kind == "group" else None), j + 1
+    if c in "^$":
+        return ("zero", None), i + 1
+    if c == ".":
+        return ("other", None), i + 1
+    if c in "*+?{":
+        raise _Unroutable(p)
+    return ("char", c), i + 1
+
+class KeywordClassifier:
+    """Matches account labels against every category of a keyword map, memoized per label.
+
+    A literal prefilter picks the patterns worth running; results equal the ``re.search`` loop.
+    """
+    def __init__(self, kw_map, memo_size=65536):
+        self.categories = list(kw_map.keys())
+        self._patterns = [(j, re.compile(p)) for j, k in enumerate(self.categories) for p in kw_map[k]]
+        self.n_patterns = len(self._patterns)
+        routes, always = {}, []
+        for i, (_, rx) in enumerate(self._patterns):
+            lits = None if rx.flags & (re.IGNORECASE | re.VERBOSE) else _pattern_literals(rx.pattern)
+            if lits is None:
+                always.append(i)
+            for lit in lits or ():
+                routes.setdefault(lit, set()).add(i)
+        # The scan reports the longest literal at each position, so a hit also
+        # routes every literal it contains.
+        self._routes = {lit: frozenset().union(*(ix for other, ix in routes.items() if other in lit))
+                        for lit in routes}
+        self._always = frozenset(always)
+        alternation = "|".join(map(re.escape, sorted(routes, key=len, reverse=True)))
+        self._scan = re.compile(f"(?=({alternation}))") if routes else None
+        self.classify = lru_cache(maxsize=memo_size)(self._classify)
+
+    def _classify(self, name: str):
+        candidates = set(self._always)
+        if self._scan is not None:
+            for lit in self._scan.findall(name):
+                candidates.update(self._routes[lit])
+        hits = [False] * len(self.categories)
+        for i in sorted(candidates):
+            j, rx = self._patterns[i]
+            if not hits[j] and rx.search(name):
+                hits[j] = True
+        return tuple(hits)
+
+    def membership(self, accounts: pd.Series):
+        """``(codes, matrix)`` for raw labels; ``matrix[codes]`` is the per-row category membership."""
+        import pandas as pd
+        with stage("classify"):
+            misses = self.classify.cache_info().misses
+            codes, uniques = pd.factorize(accounts.astype(str), use_na_sentinel=False)
+            matrix = np.zeros((len(uniques), len(self.categories)), dtype=bool)
+            for i, label in enumerate(uniques):
+                matrix[i] = self.classify(_norm(label))
+        if metrics_enabled():
+            self._count(codes, matrix, misses)
+        return codes, matrix
+
+    def codes(self, accounts):
+        """pandas-free ``membership`` for any iterable of labels (lists, NumPy arrays)."""
+        with stage("classify"):
+            misses = self.classify.cache_info().misses
+            index = {}
+            codes = np.fromiter((index.setdefault(str(a), len(index)) for a in accounts), dtype=np.intp)
+            matrix = np.array([self.classify(_norm(label)) for label in index], dtype=bool)
+            matrix = matrix.reshape(len(index), len(self.categories))
+        if metrics_enabled():
+            self._count(codes, matrix, misses)
+        return codes, matrix
+
+    def _count(self, codes, matrix, misses):
+        count("clearpass_rows_total", len(codes), stage="classify")
+        count("clearpass_patterns_evaluated_total", (self.classify.cache_info().misses - misses) * self.n_patterns)
+        count("clearpass_unmatched_labels_total", int(np.count_nonzero(~matrix.any(axis=1)[codes])))
+
+@lru_cache(maxsize=32)
+def _classifier_for_key(key):
+    return KeywordClassifier({k: list(pats) for k, pats in key})
+
+def classifier_for(kw_map=None) -> KeywordClassifier:
+    """Shared, compiled classifier for ``kw_map`` (built once per distinct map)."""
+    if kw_map is None:
+        kw_map = default_keywords()
+    return _classifier_for_key(tuple((k, tuple(pats)) for k, pats in kw_map.items()))
+
+def _category_totals(values: np.ndarray, member: np.ndarray, initial=None) -> np.ndarray:
+    """Per-category totals of shape (categories, periods), NaN skipped.
+
+    Summed left-to-right from ``initial``, bit-identical to a ``+=`` loop, also chunk by chunk.
+    """
+    valid = ~np.isnan(values)
+    out = np.zeros((member.shape[1], values.shape[1])) if initial is None else np.array(initial, dtype="float64")
+    for j in range(member.shape[1]):
+        mask = valid & member[:, j:j+1]
+        if mask.any():
+            out[j] = np.cumsum(np.vstack([out[j:j+1], np.where(mask, values, 0.0)]), axis=0)[-1]
+    return out
+
+def _sum_by_category(values: np.ndarray, member: np.ndarray, categories):
+    totals = _category_totals(values.reshape(-1, 1), member)
+    return {k: float(totals[j, 0]) for j, k in enumerate(categories)}
+
+def _to_numeric(values: pd.Series) -> pd.Series:
+    """Parse statement values: drop thousands separators and currency symbols, ``(x)`` -> ``-x``.
+
+    Numeric columns are kept as is; text goes through ``_parse_value``, so both
+    paths round like ``float()`` (``pd.to_numeric`` can be an ulp off).
+    """
+    import pandas as pd
+    if values.dtype.kind in "iuf":
+        return values.astype("float64")
+    parsed = np.fromiter(map(_parse_value, values.to_numpy(dtype=object)), dtype="float64", count=len(values))
+    return pd.Series(parsed, index=values.index, name=values.name)
+
+_VALUE_CHARS = str.maketrans({",": "", "(": "-", ")": "", "$": "", "€": "", "£": "", "¥": "", "₹": ""})
+
+def _parse_value(v) -> float:
+    """One statement value to float (NaN when unparseable); see ``_to_numeric``."""
+    if v is None:
+        return np.nan
+    if isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool):
+        return float(v)
+    text = str(v).translate(_VALUE_CHARS)
+    if "_" in text or not text.isascii():
+        return np.nan
+    try:
+        return float(text)
+    except ValueError:
+        return np.nan
+
+def period_columns(df):
+    """Year-like columns of a wide statement (``2024``, ``FY23``...), oldest first.
+
+    Accepts a DataFrame or just its column labels.
+    """
+    cols = [c for c in getattr(df, "columns", df) if re.search(r"(20\d\d)|(\bfy\d{2}\b)", str(c).lower())]
+    def year_key(c):
+        m = re.search(r"(20\d\d)", str(c))
+        return int(m.group(1)) if m else -1
+    return sorted(cols, key=year_key)
+
 def _parse_wide(df: pd.DataFrame) -> pd.DataFrame:
-    cols = [c for c in df.columns if re.search(r"(20\d\d)|(\bfy\d{2}\b)", str(c).lower())]
+    import pandas as pd
+    cols = period_columns(df)
     if not cols:
         out = df.iloc[:, :2].copy()
         out.columns = ["Account","Value"]
         return out
-    def year_key(c):
-        m = re.search(r"(20\d\d)", str(c))
-        return int(m.group(1)) if m else -1
-    latest = sorted(cols, key=year_key)[-1]
+    latest = cols[-1]
     out = pd.DataFrame({"Account": df.iloc[:,0], "Value": df[latest]})
     return out
 
 def parse_financials(input_df: pd.DataFrame, kw_map=None):
     if kw_map is None:
         kw_map = default_keywords()
-    df = input_df.copy().dropna(how="all")
-    if df.shape[1] >= 3:
-        try:
-            df = _parse_wide(df)
-        except Exception:
-            df = df.iloc[:, :2]
+    with stage("reshape"):
+        df = input_df.copy().dropna(how="all")
+        if df.shape[1] >= 3:
+            try:
+                df = _parse_wide(df)
+            except Exception:
+                df = df.iloc[:, :2]
+                df.columns = ["Account","Value"]
+        else:
             df.columns = ["Account","Value"]
-    else:
-        df.columns = ["Account","Value"]
-    df["Account"] = df["Account"].astype(str)
-    df["Value"] = df["Value"].astype(str).str.replace(",","", regex=False).str.replace("(","-", regex=False).str.replace(")","", regex=False)
-    df["Value"] = pd.to_numeric(df["Value"], errors="coerce")
-
-    agg = {k:0.0 for k in kw_map.keys()}
-    for _, row in df.iterrows():
-        name = _norm(row["Account"])
-        for k, pats in kw_map.items():
-            if any(re.search(p, name) for p in pats):
-                if pd.notnull(row["Value"]):
-                    agg[k] += float(row["Value"])
+    with stage("normalize"):
+        df["Account"] = df["Account"].astype(str)
+        df["Value"] = _to_numeric(df["Value"])
+
+    clf = classifier_for(kw_map)
+    codes, matrix = clf.membership(df["Account"])
+    with stage("aggregate"):
+        values = df["Value"].to_numpy(dtype="float64", na_value=np.nan)
+        agg = _sum_by_category(values, matrix[codes], clf.categories)
+    count("clearpass_rows_total", len(df), stage="parse")
+    return _basics_from_agg(agg), agg
 
+def parse_financials_csv(source, kw_map=None, chunksize=100_000, **read_csv_kwargs):
+    """Constant-memory ``parse_financials`` for large CSV exports, read ``chunksize`` rows at a time.
+
+    Equals ``parse_financials(pd.read_csv(source, float_precision="round_trip"))``.
+    """
+    import pandas as pd
+    if kw_map is None:
+        kw_map = default_keywords()
+    clf = classifier_for(kw_map)
+    totals = np.zeros((len(clf.categories), 1))
+    cols = None
+    reader = pd.read_csv(source, chunksize=chunksize, dtype=str, **read_csv_kwargs)
+    with reader:
+        for chunk in reader:
+            if cols is None:
+                if chunk.shape[1] < 2:
+                    raise ValueError("expected at least an account and a value column")
+                periods = period_columns(chunk) if chunk.shape[1] >= 3 else []
+                cols = [0, chunk.columns.get_loc(periods[-1]) if periods else 1]
+            part = chunk.iloc[:, cols]
+            codes, matrix = clf.membership(part.iloc[:, 0].astype(str))
+            with stage("normalize"):
+                values = _to_numeric(part.iloc[:, 1]).to_numpy(dtype="float64", na_value=np.nan)
+            with stage("aggregate"):
+                totals = _category_totals(values.reshape(-1, 1), matrix[codes], totals)
+            count("clearpass_rows_total", len(part), stage="parse")
+    agg = {k: float(totals[j, 0]) for j, k in enumerate(clf.categories)}
+    return _basics_from_agg(agg), agg
+
+def _header_names(header):
+    """Column names as ``pd.read_csv`` gives them: blanks ``Unnamed: i``, repeats ``x.1``, ``x.2``..."""
+    names = [h or f"Unnamed: {i}" for i, h in enumerate(header)]
+    counts = {}
+    for i, col in enumerate(names):
+        n = counts.get(col, 0)
+        while n > 0:
+            counts[col] = n + 1
+            col = f"{col}.{n}"
+            n = counts.get(col, 0)
+        names[i] = col
+        counts[col] = n + 1
+    return names
+
+def read_csv_records(data, encoding="utf-8-sig"):
+    """pandas-free CSV reader returning the ``(accounts, values)`` ``parse_financials`` would use."""
+    count("clearpass_bytes_read_total", len(data), source="csv")
+    with stage("read"):
+        text = data.decode(encoding) if isinstance(data, (bytes, bytearray)) else data
+        rows = csv.reader(io.StringIO(text))
+        header = next(rows, None)
+        if header is None:
+            return [], []
+        if len(header) < 2:
+            raise ValueError("expected at least an account and a value column")
+        names = _header_names(header)
+        periods = period_columns(names) if len(names) >= 3 else []
+        col = names.index(periods[-1]) if periods else 1
+        accounts, values = [], []
+        for row in rows:
+            if not any(cell.strip() for cell in row):
+                continue
+            accounts.append(row[0] or "nan")
+            values.append(row[col] if len(row) > col else None)
+    return accounts, values
+
+def parse_records(accounts, values, kw_map=None):
+    """pandas-free ``parse_financials`` over parallel sequences of labels and values."""
+    clf = classifier_for(kw_map)
+    codes, matrix = clf.codes(accounts)
+    with stage("normalize"):
+        if isinstance(values, np.ndarray) and values.dtype.kind in "fiu":
+            vals = values.astype("float64", copy=False)
+        else:
+            vals = np.array([_parse_value(v) for v in values], dtype="float64")
+    with stage("aggregate"):
+        agg = _sum_by_category(vals, matrix[codes], clf.categories)
+    count("clearpass_rows_total", len(vals), stage="parse")
+    return _basics_from_agg(agg), agg
+
+def _basics_from_agg(agg):
     current_assets = agg.get('current_assets') or ( (agg.get('cash') or 0)+(agg.get('accounts_receivable') or 0)+(agg.get('inventory') or 0) )
     basics = {
         'Revenue': agg.get('revenue') or np.nan,
@@ -104,13 +445,38 @@ def parse_financials(input_df: pd.DataFrame, kw_map=None):
         'Interest Paid': agg.get('interest_paid') or np.nan,
         'Principal Repayment': agg.get('principal_repayment') or np.nan
     }
-    return basics, agg
+    return basics
+
+def parse_financials_periods(input_df: pd.DataFrame, kw_map=None):
+    """Parse every period column of a wide statement in one pass.
+
+    Returns ``(basics, agg)`` DataFrames indexed by period, oldest first.
+    """
+    import pandas as pd
+    if kw_map is None:
+        kw_map = default_keywords()
+    df = input_df.dropna(how="all")
+    periods = period_columns(df) if df.shape[1] >= 3 else []
+    if not periods:
+        periods = [df.columns[1]]
+    clf = classifier_for(kw_map)
+    codes, matrix = clf.membership(df.iloc[:, 0])
+    with stage("normalize"):
+        values = np.column_stack([_to_numeric(df[p]).to_numpy(dtype="float64", na_value=np.nan) for p in periods])
+    with stage("aggregate"):
+        totals = _category_totals(values.reshape(len(df), len(periods)), matrix[codes])
+    count("clearpass_rows_total", len(df) * len(periods), stage="parse")
+    aggs = [{k: float(totals[j, i]) for j, k in enumerate(clf.categories)} for i in range(len(periods))]
+    index = pd.Index(periods, name="Period")
+    basics = pd.DataFrame([_basics_from_agg(a) for a in aggs], index=index)
+    return basics, pd.DataFrame(aggs, index=index)
 
 def _safe_div(a,b):
-    if b in (None,0) or (isinstance(b,float) and pd.isna(b)): return np.nan
-    if a is None or (isinstance(a,float) and pd.isna(a)): return np.nan
+    if b in (None,0) or (isinstance(b,float) and math.isnan(b)): return np.nan
+    if a is None or (isinstance(a,float) and math.isnan(a)): return np.nan
     return float(a)/float(b)
 
+@timed("ratios")
 def compute_ratios(basics: Dict[str,float]):
     ca = basics.get('Current Assets'); cl = basics.get('Current Liabilities')
     cash = basics.get('Cash'); ar = basics.get('Accounts Receivable'); inv = basics.get('Inventory')
@@ -134,18 +500,222 @@ def compute_ratios(basics: Dict[str,float]):
     ratios['DSCR (CFO / Debt Service)'] = None if denom==0 else round((cfo or 0)/denom, 2)
     out = {}
     for k,v in ratios.items():
-        if v is None or (isinstance(v,float) and pd.isna(v)): out[k] = None
+        if v is None or (isinstance(v,float) and math.isnan(v)): out[k] = None
         else: out[k] = round(float(v),2)
     return out
 
-def benchmark_for(industry: str):
-    row = BENCHMARKS[BENCHMARKS['industry_name']==industry]
-    if row.empty: row = BENCHMARKS.iloc[[0]]
-    r = row.iloc[0].to_dict()
-    return {
-        'Current Ratio': r['current_ratio_median'],
-        'Quick Ratio': r['quick_ratio_median'],
-        'Debt-to-Equity': r['d_to_e_median'],
-        'Profit Margin (%)': r['profit_margin_median'],
-        'Return on Assets (%)': r['roa_median'],
-    }
+RATIO_INPUTS = ['Current Assets','Current Liabilities','Cash','Accounts Receivable','Inventory','Total Liabilities',
+                'Equity','Total Assets','Revenue','Net Income','EBIT','EBITDA','Interest Expense','COGS','CFO',
+                'Principal Repayment','Interest Paid']
+
+def _masked_div(a, b):
+    """Column version of ``_safe_div``: NaN where ``b`` is 0/NaN or ``a`` is NaN."""
+    ok = (b != 0) & ~np.isnan(b) & ~np.isnan(a)
+    return np.divide(a, b, out=np.full(np.shape(a), np.nan), where=ok)
+
+def _or0(x):
+    """Column version of ``x or 0`` for float inputs (NaN is truthy, zeros collapse to 0)."""
+    return np.where(x == 0, 0.0, x)
+
+def _round2(x):
+    """Element-wise ``round(x, 2)`` with Python's correctly rounded semantics.
+
+    ``np.round`` scales by 100 first, which can flip values sitting next to a
+    rounding boundary; those few (plus huge/non-finite values) go through ``round``.
+    """
+    with np.errstate(invalid="ignore", over="ignore"):
+        y = x * 100.0
+        r = np.rint(y)
+        ay = np.abs(y)
+        slow = (np.abs(np.abs(y - r) - 0.5) <= ay * 1e-15) | (ay >= 2.0**50)
+        out = np.divide(r, 100.0, out=r)
+    for i in np.flatnonzero(slow):
+        out[i] = round(float(x[i]), 2)
+    return out
+
+def ratio_arrays(col, missing=frozenset()) -> Dict[str, np.ndarray]:
+    """Unrounded ``compute_ratios`` over float arrays (NaN when undefined).
+
+    Keys in ``missing`` behave like absent dict keys.
+    """
+    def z(k):
+        return np.zeros_like(col[k]) if k in missing else col[k]
+    ca, cl = col['Current Assets'], col['Current Liabilities']
+    tl, eq, ta = col['Total Liabilities'], col['Equity'], col['Total Assets']
+    rev, ni = col['Revenue'], col['Net Income']
+    ebit, ebitda, int_exp = col['EBIT'], col['EBITDA'], col['Interest Expense']
+    cash, ar = z('Cash'), z('Accounts Receivable')
+    with np.errstate(invalid="ignore", over="ignore"):
+        quick_assets = np.where((cash != 0) | (ar != 0), _or0(cash) + _or0(ar), _or0(z('Current Assets')) - _or0(z('Inventory')))
+        ratios = {
+            'Current Ratio': _masked_div(ca, cl),
+            'Quick Ratio': _masked_div(quick_assets, cl),
+            'Debt-to-Equity': _masked_div(tl, eq),
+            'Profit Margin (%)': _masked_div(ni, rev)*100,
+            'Return on Assets (%)': _masked_div(ni, ta)*100,
+            'Interest Coverage (EBIT)': _masked_div(ebit, int_exp),
+            'Interest Coverage (EBITDA)': _masked_div(ebitda, int_exp),
+            'Gross Margin (%)': _masked_div(rev - _or0(z('COGS')), rev)*100,
+            'Operating Margin (%)': _masked_div(ebit, rev)*100,
+        }
+        interest_paid = np.where(z('Interest Paid') != 0, z('Interest Paid'), z('Interest Expense'))
+        denom = _or0(interest_paid) + _or0(z('Principal Repayment'))
+        ratios['DSCR (CFO / Debt Service)'] = _masked_div(_or0(z('CFO')), denom)
+    return ratios
+
+@timed("ratios")
+def compute_ratios_frame(basics) -> pd.DataFrame:
+    """Vectorized ``compute_ratios``: one row of ratios per row of ``basics``, NaN where the scalar gives None."""
+    import pandas as pd
+    df = basics if isinstance(basics, pd.DataFrame) else pd.DataFrame(basics)
+    col = {k: (df[k].to_numpy(dtype="float64", na_value=np.nan) if k in df.columns else np.full(len(df), np.nan))
+           for k in RATIO_INPUTS}
+    ratios = ratio_arrays(col, missing=frozenset(RATIO_INPUTS) - set(df.columns))
+    return pd.DataFrame({k: _round2(v) for k, v in ratios.items()}, index=df.index)
+
+def compute_ratios_periods(basics: pd.DataFrame) -> pd.DataFrame:
+    """Ratio table matching a period-indexed basics table (None where a ratio is undefined)."""
+    ratios = compute_ratios_frame(basics).astype(object)
+    return ratios.where(ratios.notna(), None)
+
+BENCHMARK_COLUMNS = {
+    'Current Ratio': 'current_ratio_median',
+    'Quick Ratio': 'quick_ratio_median',
+    'Debt-to-Equity': 'd_to_e_median',
+    'Profit Margin (%)': 'profit_margin_median',
+    'Return on Assets (%)': 'roa_median',
+}
+
+def _naics_str(code) -> str:
+    return re.sub(r"\D", "", str(code).split(".")[0])
+
+class BenchmarkStore:
+    """Sector medians indexed by ``"naics|size_band|year"`` keys; arrays may be shared memory maps."""
+    def __init__(self, keys, values):
+        self.keys = keys
+        self.values = values
+        self._index = self._build_index()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame):
+        """Build from a table with ``naics``, the ``*_median`` columns and optional ``size_band`` / ``year``."""
+        import pandas as pd
+        band = df['size_band'].fillna("").astype(str) if 'size_band' in df.columns else pd.Series("", index=df.index)
+        year = (pd.to_numeric(df['year'], errors="coerce").fillna(-1).astype(int).astype(str)
+                if 'year' in df.columns else pd.Series("-1", index=df.index))
+        naics = df['naics'].map(_naics_str)
+        keys = (naics + "|" + band.str.strip().str.lower() + "|" + year).to_numpy(dtype=str)
+        values = df[list(BENCHMARK_COLUMNS.values())].to_numpy(dtype="float64")
+        return cls(keys, values)
+
+    @classmethod
+    def open(cls, path: str, index_dir=None):
+        """Load a CSV/Parquet benchmark table through a memory-mapped copy in ``index_dir``.
+
+        The copy is rebuilt, atomically and stamp last, when the source changes.
+        """
+        import pandas as pd
+        index_dir = index_dir or path + ".idx"
+        stamp = f"{os.path.getsize(path)}:{os.path.getmtime(path)}"
+        stamp_path = os.path.join(index_dir, "source.txt")
+        try:
+            with open(stamp_path) as fh:
+                fresh = fh.read() == stamp
+        except OSError:
+            fresh = False
+        if not fresh:
+            df = pd.read_parquet(path) if path.lower().endswith((".parquet", ".pq")) else pd.read_csv(path, dtype={'naics': str})
+            store = cls.from_frame(df)
+            try:
+                os.makedirs(index_dir, exist_ok=True)
+                for name, array in [("keys.npy", store.keys), ("values.npy", store.values)]:
+                    tmp = os.path.join(index_dir, f".{name}.{os.getpid()}")
+                    with open(tmp, "wb") as fh:
+                        np.save(fh, array)
+                    os.replace(tmp, os.path.join(index_dir, name))
+                tmp = f"{stamp_path}.{os.getpid()}"
+                with open(tmp, "w") as fh:
+                    fh.write(stamp)
+                os.replace(tmp, stamp_path)
+            except OSError:
+                return store
+        return cls(np.load(os.path.join(index_dir, "keys.npy"), mmap_mode="r"),
+                   np.load(os.path.join(index_dir, "values.npy"), mmap_mode="r"))
+
+    def _build_index(self):
+        grouped = {}
+        for row, key in enumerate(self.keys.tolist()):
+            naics, band, year = key.split("|")
+            grouped.setdefault((naics, band), []).append((int(year), row))
+        self._index = {k: sorted(v) for k, v in grouped.items()}
+        return self._index
+
+    def locate(self, naics, size_band=None, year=None):
+        """Row number for ``naics`` (falling back along its prefixes, band and year) or None."""
+        index = self._index
+        code = _naics_str(naics)
+        bands = [str(size_band).strip().lower(), ""] if size_band else [""]
+        for n in range(len(code), 1, -1):
+            for band in bands:
+                entries = index.get((code[:n], band))
+                if not entries:
+                    continue
+                if year is None:
+                    return entries[-1][1]
+                earlier = [row for y, row in entries if y <= int(year)]
+                return earlier[-1] if earlier else entries[-1][1]
+        return None
+
+    def lookup(self, naics, size_band=None, year=None):
+        """Benchmark dict for one borrower; ``matched_naics`` shows which prefix was used."""
+        row = self.locate(naics, size_band, year)
+        if row is None:
+            raise KeyError(f"No benchmark for NAICS {naics!r} or any of its prefixes")
+        out = {name: float(v) for name, v in zip(BENCHMARK_COLUMNS, self.values[row])}
+        out['matched_naics'] = self.keys[row].split("|")[0]
+        return out
+
+    def lookup_many(self, naics, size_bands=None, years=None) -> pd.DataFrame:
+        """Bulk lookup: one row of benchmarks per borrower (NaN where nothing matches)."""
+        import pandas as pd
+        naics = list(naics)
+        size_bands = [None] * len(naics) if size_bands is None else list(size_bands)
+        years = [None] * len(naics) if years is None else list(years)
+        memo = {}
+        rows = np.empty(len(naics), dtype=np.int64)
+        for i, key in enumerate(zip(naics, size_bands, years)):
+            if key not in memo:
+                hit = self.locate(*key)
+                memo[key] = -1 if hit is None else hit
+            rows[i] = memo[key]
+        found = rows >= 0
+        values = np.full((len(naics), len(BENCHMARK_COLUMNS)), np.nan)
+        values[found] = self.values[rows[found]]
+        out = pd.DataFrame(values, columns=list(BENCHMARK_COLUMNS))
+        matched = np.full(len(naics), None, dtype=object)
+        matched[found] = [self.keys[r].split("|")[0] for r in rows[found]]
+        out['matched_naics'] = matched
+        return out
+
+_benchmark_store = None
+
+def benchmark_store() -> BenchmarkStore:
+    """Process-wide store: the table at ``CLEARPASS_BENCHMARKS`` if set, else ``BENCHMARKS``."""
+    global _benchmark_store
+    if _benchmark_store is None:
+        path = os.environ.get("CLEARPASS_BENCHMARKS")
+        _benchmark_store = BenchmarkStore.open(path) if path else BenchmarkStore.from_frame(_benchmarks())
+    return _benchmark_store
+
+_INDUSTRY_NAICS = {name: _naics_str(naics) for naics, name, *_ in _BENCHMARK_ROWS}
+
+def benchmark_for(industry, size_band=None, year=None):
+    """Benchmarks for an industry name or NAICS code (prefix fallback, else the first ``BENCHMARKS`` row)."""
+    code = _INDUSTRY_NAICS.get(industry)
+    if code is None and re.fullmatch(r"\s*\d{2,6}\s*", str(industry)):
+        code = str(industry).strip()
+    store = benchmark_store()
+    row = store.locate(code or _naics_str(_BENCHMARK_ROWS[0][0]), size_band, year)
+    if row is None:
+        return {name: float(v) for name, v in zip(BENCHMARK_COLUMNS, _BENCHMARK_ROWS[0][2:])}
+    return {name: float(v) for name, v in zip(BENCHMARK_COLUMNS, store.values[row])}
@@ -0,0 +1,204 @@
+"""Memoized stage graph behind the Streamlit app.
+
+A stage's key hashes its inputs and upstream keys, so a widget change reruns
+only the stages downstream of it.
+
+    ingest -> merge -> analysis -> summary
+                    \\           \\-> comparison <- benchmark <- industry
+                     \\           \\-> stress
+                      \\-> trends -> charts
+    analysis + benchmark + company/year -> report_pdf / report_docx
+"""
+import hashlib
+import io
+import re
+from collections import OrderedDict
+
+import numpy as np
+
+from shared.metrics import stage
+
+def _token(value) -> str:
+    """Stable fingerprint of a stage input."""
+    if isinstance(value, (bytes, bytearray)):
+        return "b:" + hashlib.sha256(value).hexdigest()
+    if isinstance(value, np.ndarray):
+        return f"a:{value.dtype}:{value.shape}:" + hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()
+    if isinstance(value, (list, tuple)):
+        return "(" + ",".join(_token(v) for v in value) + ")"
+    if isinstance(value, dict):
+        return "{" + ",".join(f"{k!r}:{_token(v)}" for k, v in sorted(value.items())) + "}"
+    return repr(value)
+
+class StageGraph:
+    """Stages registered with ``@graph.stage(name, deps, inputs)`` and evaluated with ``graph.get``."""
+    def __init__(self, keep=4):
+        self.keep = keep
+        self.stages = {}
+        self.computed = []
+        self._memo = {}
+
+    def stage(self, name, deps=(), inputs=()):
+        """Register ``fn(*dep_values, **inputs)`` as stage ``name``."""
+        def register(fn):
+            self.stages[name] = (fn, tuple(deps), tuple(inputs))
+            return fn
+        return register
+
+    def key(self, name, inputs, _keys=None) -> str:
+        keys = {} if _keys is None else _keys
+        if name not in keys:
+            _, deps, params = self.stages[name]
+            parts = [name, *(self.key(d, inputs, keys) for d in deps), *(_token(inputs.get(p)) for p in params)]
+            keys[name] = hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+        return keys[name]
+
+    def get(self, name, inputs, _keys=None):
+        """Value of stage ``name`` for ``inputs``, computing it (and stale upstream stages) only when needed."""
+        keys = {} if _keys is None else _keys
+        key = self.key(name, inputs, keys)
+        memo = self._memo.setdefault(name, OrderedDict())
+        if key in memo:
+            memo.move_to_end(key)
+            return memo[key]
+        fn, deps, params = self.stages[name]
+        args = [self.get(d, inputs, keys) for d in deps]
+        with stage("app_" + name):
+            value = fn(*args, **{p: inputs.get(p) for p in params})
+        memo[key] = value
+        while len(memo) > self.keep:
+            memo.popitem(last=False)
+        self.computed.append(name)
+        return value
+
+    def clear(self):
+        self._memo.clear()
+        self.computed.clear()
+
+SAMPLE = {
+    "Line Item": ["Revenue","COGS","Operating Expenses","EBIT","Net Income","Cash","Accounts Receivable","Inventory",
+                  "Current Assets","Current Liabilities","Total Liabilities","Equity","Total Assets","Interest Expense",
+                  "Net cash provided by operating activities","Repayments of borrowings"],
+    "2022": [1_000_000,600_000,250_000,150_000,90_000,50_000,40_000,30_000,150_000,80_000,220_000,300_000,520_000,20_000,85_000,15_000],
+    "2023": [1_200_000,720_000,300_000,180_000,120_000,60_000,45_000,28_000,160_000,81_000,230_000,320_000,550_000,22_000,95_000,18_000],
+    "2024": [1_350_000,800_000,335_000,215_000,150_000,62_000,50_000,25_000,170_000,85_000,240_000,340_000,580_000,24_000,110_000,20_000],
+}
+
+TREND_METRICS = ["Current Ratio", "Debt-to-Equity", "Profit Margin (%)"]
+
+COMPARED = ["Current Ratio", "Quick Ratio", "Debt-to-Equity", "Profit Margin (%)", "Return on Assets (%)"]
+
+def chart_png(x, y, title) -> bytes:
+    """One trend line rendered to PNG (object-oriented matplotlib, no pyplot state)."""
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(6.4, 4.8))
+    ax = fig.add_subplot()
+    ax.plot(x, y, marker="o")
+    ax.set_title(title)
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=100)
+    return buf.getvalue()
+
+def app_graph(cache=None) -> StageGraph:
+    """The Streamlit app's stages. Inputs: ``files`` (``[(name, bytes)]``), ``industry``,
+    ``company``, ``fiscal_year``, ``stress_grid`` and ``tax_rate``."""
+    import pandas as pd
+    from shared.parsing import (parse_financials, parse_financials_periods, compute_ratios, compute_ratios_periods,
+                                benchmark_for, default_keywords)
+    from memo import ai_like_summary
+    from rendering import render
+    from result_cache import default_cache, cache_key, content_digest, keyword_map_digest
+    from stress import stress_test
+
+    cache = cache or default_cache()
+    g = StageGraph()
+
+    @g.stage("ingest", inputs=["files"])
+    def ingest(files):
+        """``[(name, digest, frame, error)]`` per upload; frames come from the result cache by content."""
+        from parser_pdf import PDF_WORKERS, extract_tables_to_long
+        out = []
+        for name, data in files or []:
+            ext = name.lower().rsplit(".", 1)[-1]
+            if ext == "pdf":
+                read = lambda: extract_tables_to_long(data, workers=PDF_WORKERS)
+            elif ext == "csv":
+                read = lambda: pd.read_csv(io.BytesIO(data), float_precision="round_trip")
+            else:
+                read = lambda: pd.read_excel(io.BytesIO(data), sheet_name=0)
+            try:
+                digest = content_digest(data)
+                out.append((name, digest, cache.get_or_compute(cache_key("frame:" + ext, digest), read), None))
+            except Exception as e:
+                out.append((name, None, None, str(e)))
+        return out
+
+    @g.stage("merge", deps=["ingest"])
+    def merge(frames):
+        """``(merged, wide_candidate, digests)``; the built-in sample when nothing was uploaded."""
+        dfs = [df for _, _, df, err in frames if err is None]
+        digests = [d for _, d, _, err in frames if err is None]
+        wide = next((df for df in reversed(dfs) if df.shape[1] >= 3), None)
+        if not dfs:
+            sample = pd.DataFrame(SAMPLE)
+            return sample, sample, []
+        return pd.concat(dfs, ignore_index=True), wide, digests
+
+    @g.stage("analysis", deps=["merge"])
+    def analysis(merged):
+        frame, _, digests = merged
+        def compute():
+            b, _ = parse_financials(frame, default_keywords())
+            return b, compute_ratios(b)
+        if digests:
+            return cache.get_or_compute(cache_key("analysis:merged", *digests, keyword_map_digest()), compute)
+        return compute()
+
+    @g.stage("benchmark", inputs=["industry"])
+    def benchmark(industry):
+        return benchmark_for(industry)
+
+    @g.stage("summary", deps=["analysis"])
+    def summary(result):
+        return ai_like_summary(result[1])
+
+    @g.stage("comparison", deps=["analysis", "benchmark"], inputs=["industry"])
+    def comparison(result, bench, industry):
+        ratios = result[1]
+        lines = []
+        for k in COMPARED:
+            v = ratios.get(k)
+            lines.append(f"- {k}: {'n/a' if v is None else v} vs {industry} median {bench[k]}")
+        return "\n".join(lines)
+
+    @g.stage("trends", deps=["merge"])
+    def trends(merged):
+        """Ratio table per year of the wide upload, or None when it has fewer than two years."""
+        _, wide, _ = merged
+        if wide is None:
+            return None
+        years = [c for c in wide.columns if re.search(r"20\d\d", str(c))]
+        if len(years) < 2:
+            return None
+        period_basics, _ = parse_financials_periods(wide[[wide.columns[0], *years]], default_keywords())
+        return compute_ratios_periods(period_basics).loc[years]
+
+    @g.stage("charts", deps=["trends"])
+    def charts(table):
+        if table is None:
+            return {}
+        return {m: chart_png([str(y) for y in table.index], table[m].to_numpy(dtype="float64", na_value=np.nan), m) for m in TREND_METRICS}
+
+    @g.stage("stress", deps=["analysis"], inputs=["stress_grid", "tax_rate"])
+    def stress(result, stress_grid, tax_rate):
+        return stress_test(result[0], stress_grid, tax_rate=tax_rate or 0.0)
+
+    def report(fmt):
+        def build(result, bench, company, fiscal_year, industry):
+            basics, ratios = result
+            return render(fmt, company, fiscal_year, industry, basics, ratios, bench)
+        return build
+
+    g.stage("report_pdf", deps=["analysis", "benchmark"], inputs=["company", "fiscal_year", "industry"])(report("pdf"))
+    g.stage("report_docx", deps=["analysis", "benchmark"], inputs=["company", "fiscal_year", "industry"])(report("docx"))
+    return g
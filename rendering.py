@@ -0,0 +1,111 @@
+"""Underwriting report / memo exporters rendering straight to bytes.
+
+Renders are cached in the result cache and identical in-flight requests share one future.
+"""
+import hashlib
+import io
+import json
+import os
+import textwrap
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from export_docx import memo_to_docx
+from memo import underwriting_memo
+from result_cache import default_cache
+from shared.metrics import timed
+
+RENDER_WORKERS = int(os.environ.get("CLEARPASS_RENDER_WORKERS", 2))
+FORMATS = {"pdf": "application/pdf",
+           "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"}
+
+_pool = None
+_inflight = {}
+_lock = threading.Lock()
+
+def _page():
+    from matplotlib.figure import Figure
+    return Figure(figsize=(8.27, 11.69))
+
+@timed("render_pdf")
+def render_report_pdf(company, year, industry, basics, ratios, bench) -> bytes:
+    from matplotlib.patches import Rectangle
+    from matplotlib.backends.backend_pdf import PdfPages
+    buf = io.BytesIO()
+    with PdfPages(buf) as pdf:
+        fig = _page()
+        ax = fig.add_axes([0,0,1,1]); ax.axis("off")
+        ax.add_patch(Rectangle((0,0.93), 1,0.07, transform=ax.transAxes))
+        ax.text(0.06, 0.965, 'ClearPass — Underwriting Report', fontsize=18, weight='bold', transform=ax.transAxes, va='center')
+        ax.text(0.06, 0.84, company, fontsize=22, weight='bold')
+        ax.text(0.06, 0.80, f'Fiscal Year: {year}', fontsize=11)
+        ax.text(0.06, 0.77, f'Industry: {industry}', fontsize=11)
+        pdf.savefig(fig)
+
+        fig = _page()
+        ax = fig.add_axes([0.08,0.12,0.84,0.78]); ax.axis("off")
+        ax.set_title("Key Ratios & Benchmarks", loc="left", fontsize=16, pad=10)
+        rows = [
+            ("Current Ratio", ratios.get("Current Ratio"), bench["Current Ratio"]),
+            ("Quick Ratio", ratios.get("Quick Ratio"), bench["Quick Ratio"]),
+            ("Debt-to-Equity", ratios.get("Debt-to-Equity"), bench["Debt-to-Equity"]),
+            ("Profit Margin (%)", ratios.get("Profit Margin (%)"), bench["Profit Margin (%)"]),
+            ("Return on Assets (%)", ratios.get("Return on Assets (%)"), bench["Return on Assets (%)"]),
+            ("Interest Coverage (EBIT)", ratios.get("Interest Coverage (EBIT)"), "≥3.0x target"),
+            ("Interest Coverage (EBITDA)", ratios.get("Interest Coverage (EBITDA)"), "≥3.0x target"),
+            ("DSCR (CFO / Debt Service)", ratios.get("DSCR (CFO / Debt Service)"), "≥1.25x preferred"),
+        ]
+        y=0.95
+        for name, val, b in rows:
+            ax.text(0.02,y,f"{name}", fontsize=11)
+            ax.text(0.55,y,f"{'n/a' if (val is None or (isinstance(val,float) and np.isnan(val))) else round(val,2)}", fontsize=11)
+            ax.text(0.78,y,f"{'' if (b is None) else b}", fontsize=11)
+            y -= 0.06
+        pdf.savefig(fig)
+
+        memo = underwriting_memo(company, year, industry, basics, ratios, bench)
+        fig = _page()
+        ax = fig.add_axes([0.08,0.08,0.84,0.84]); ax.axis("off")
+        ax.set_title("Underwriting Memo", loc="left", fontsize=16, pad=10)
+        wrapped = textwrap.fill(memo, 110)
+        ax.text(0,1, wrapped, va="top", fontsize=10)
+        pdf.savefig(fig)
+    return buf.getvalue()
+
+@timed("render_docx")
+def render_memo_docx(company, year, industry, basics, ratios, bench) -> bytes:
+    buf = io.BytesIO()
+    memo_to_docx(underwriting_memo(company, year, industry, basics, ratios, bench), buf)
+    return buf.getvalue()
+
+_RENDERERS = {"pdf": render_report_pdf, "docx": render_memo_docx}
+
+def report_key(fmt, company, year, industry, basics, ratios, bench) -> str:
+    payload = json.dumps([fmt, company, year, industry, basics, ratios, bench], sort_keys=True, default=str)
+    return "report:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def submit_render(fmt, company, year, industry, basics, ratios, bench):
+    """Start (or join) a background render; returns a Future resolving to the document bytes."""
+    global _pool
+    key = report_key(fmt, company, year, industry, basics, ratios, bench)
+    with _lock:
+        fut = _inflight.get(key)
+        if fut is not None:
+            return fut
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix="clearpass-render")
+        render = _RENDERERS[fmt]
+        fut = _pool.submit(default_cache().get_or_compute, key,
+                           lambda: render(company, year, industry, basics, ratios, bench))
+        _inflight[key] = fut
+    fut.add_done_callback(lambda _: _forget(key))
+    return fut
+
+def _forget(key):
+    with _lock:
+        _inflight.pop(key, None)
+
+def render(fmt, company, year, industry, basics, ratios, bench) -> bytes:
+    """Render (or fetch from cache) a ``pdf`` report or ``docx`` memo and return its bytes."""
+    return submit_render(fmt, company, year, industry, basics, ratios, bench).result()
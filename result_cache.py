@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from contextlib import contextmanager
+
+_USER_CACHE = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "clearpass")
+CACHE_DIR = os.environ.get("CLEARPASS_CACHE_DIR", _USER_CACHE)
+CACHE_MAX_MB = float(os.environ.get("CLEARPASS_CACHE_MAX_MB", 512))
+CACHE_MEMORY_ITEMS = int(os.environ.get("CLEARPASS_CACHE_MEMORY_ITEMS", 256))
+CACHE_MEMORY_MB = float(os.environ.get("CLEARPASS_CACHE_MEMORY_MB", 256))
+
+def content_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def keyword_map_digest(kw_map=None) -> str:
+    if kw_map is None:
+        from shared.parsing import default_keywords
+        kw_map = default_keywords()
+    return hashlib.sha256(json.dumps(kw_map).encode("utf-8")).hexdigest()
+
+def cache_key(kind: str, *parts: str) -> str:
+    """Key for a cached result, e.g. ``cache_key("frame:csv", content_digest(data))``."""
+    return kind + ":" + hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+def _check_private(path):
+    """Refuse a cache path another user owns or can write: its pickles would run as us."""
+    if not hasattr(os, "getuid") or not os.path.exists(path):
+        return
+    st = os.stat(path)
+    if st.st_uid != os.getuid() or st.st_mode & 0o022:
+        raise PermissionError(f"{path} must be owned by this user and not group/world writable")
+
+def _sizeof(value) -> int:
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if hasattr(value, "memory_usage"):
+        return int(value.memory_usage(deep=True).sum())
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+class ResultCache:
+    """Two-tier cache: an in-process LRU over a shared SQLite file of pickled blobs.
+
+    The disk directory must be private to this user; ``path=None`` is memory-only.
+    """
+    def __init__(self, path=None, max_bytes=512 * 1024 * 1024, memory_items=256, memory_bytes=256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.memory_bytes = memory_bytes
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "puts": 0, "evictions": 0}
+        if path:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            _check_private(directory)
+            _check_private(path)
+            with self._connect() as con:
+                con.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB, size INTEGER, accessed REAL)")
+                con.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+
+    @contextmanager
+    def _connect(self):
+        con = sqlite3.connect(self.path, timeout=30)
+        try:
+            with con:
+                yield con
+        finally:
+            con.close()
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.stats[name] += n
+
+    def _remember(self, key, value, size):
+        with self._lock:
+            if key in self._memory:
+                self._memory_size -= self._memory.pop(key)[1]
+            self._memory[key] = (value, size)
+            self._memory_size += size
+            while self._memory and (len(self._memory) > self.memory_items or self._memory_size > self.memory_bytes):
+                self._memory_size -= self._memory.popitem(last=False)[1][1]
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return self._memory[key][0]
+        if self.path:
+            with self._connect() as con:
+                row = con.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    con.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+            if row is not None:
+                value = pickle.loads(row[0])
+                self._remember(key, value, len(row[0]))
+                self._count("disk_hits")
+                return value
+        self._count("misses")
+        return default
+
+    def put(self, key, value):
+        self._count("puts")
+        if not self.path:
+            self._remember(key, value, _sizeof(value))
+            return
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._remember(key, value, len(blob))
+        with self._connect() as con:
+            con.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", (key, blob, len(blob), time.time()))
+            total = con.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            evicted = 0
+            while total > self.max_bytes:
+                row = con.execute("SELECT key, size FROM entries ORDER BY accessed LIMIT 1").fetchone()
+                if row is None or row[0] == key:
+                    break
+                con.execute("DELETE FROM entries WHERE key = ?", (row[0],))
+                total -= row[1]
+                evicted += 1
+        if evicted:
+            self._count("evictions", evicted)
+
+    def get_or_compute(self, key, compute):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self, disk=True):
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+        if disk and self.path:
+            with self._connect() as con:
+                con.execute("DELETE FROM entries")
+
+_default = None
+_default_lock = threading.Lock()
+
+def default_cache() -> ResultCache:
+    """Process-wide cache configured from ``CLEARPASS_CACHE_*`` (dir ``""`` disables the disk tier).
+
+    Falls back to memory only when the cache directory is not private to this user.
+    """
+    global _default
+    with _default_lock:
+        if _default is None:
+            path = os.path.join(CACHE_DIR, "results.sqlite") if CACHE_DIR else None
+            sizes = (int(CACHE_MAX_MB * 1024 * 1024), CACHE_MEMORY_ITEMS, int(CACHE_MEMORY_MB * 1024 * 1024))
+            try:
+                _default = ResultCache(path, *sizes)
+            except PermissionError as e:
+                warnings.warn(f"result cache disk tier disabled: {e}")
+                _default = ResultCache(None, *sizes)
+        return _default
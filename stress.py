@@ -0,0 +1,168 @@
+"""Scenario stress testing of a parsed statement against the memo thresholds.
+
+Shocks (``revenue_pct``, ``cogs_pct``, ``rate_bps``, ``ar_days``, ``inventory_days``)
+are applied as NumPy broadcasts. First-order model, meant for screening.
+"""
+import math
+import os
+
+import numpy as np
+
+from shared.metrics import timed
+from shared.parsing import RATIO_INPUTS, ratio_arrays
+
+SHOCKS = ["revenue_pct", "cogs_pct", "rate_bps", "ar_days", "inventory_days"]
+
+# Memo "Indicative Decision Framework": approve if all of these hold.
+THRESHOLDS = {
+    "DSCR (CFO / Debt Service)": (">=", 1.25),
+    "Interest Coverage": (">=", 3.0),
+    "Current Ratio": (">=", 1.2),
+    "Debt-to-Equity": ("<=", 1.5),
+}
+
+DEFAULT_GRID = {
+    "revenue_pct": np.linspace(-0.30, 0.10, 9),
+    "cogs_pct": np.linspace(0.0, 0.15, 7),
+    "rate_bps": np.linspace(0, 400, 9),
+    "ar_days": np.linspace(0, 30, 7),
+    "inventory_days": np.linspace(0, 30, 7),
+}
+
+# Adverse end of the one-factor sweeps used for breakpoints.
+BREAKPOINT_RANGE = {"revenue_pct": -1.0, "cogs_pct": 1.0, "rate_bps": 2000.0, "ar_days": 365.0, "inventory_days": 365.0}
+BREAKPOINT_STEPS = 401
+
+PERCENTILES = [5, 25, 50, 75, 95]
+MAX_SCENARIOS = int(os.environ.get("CLEARPASS_STRESS_MAX_SCENARIOS", 500_000))
+
+def check_grid(sizes):
+    """Raise ``ValueError`` for unknown shocks, empty axes or too many scenarios; ``sizes`` maps shock -> axis length."""
+    unknown = set(sizes) - set(SHOCKS)
+    if unknown:
+        raise ValueError(f"unknown shocks: {sorted(unknown)}")
+    empty = [k for k in SHOCKS if k in sizes and sizes[k] < 1]
+    if empty:
+        raise ValueError(f"empty shock axes: {empty}")
+    n = math.prod(sizes.values())
+    if n > MAX_SCENARIOS:
+        raise ValueError(f"grid has {n} scenarios, more than the {MAX_SCENARIOS} allowed")
+
+def scenario_grid(**axes):
+    """Full cartesian product of the given shock values as flat arrays (one per ``SHOCKS`` key).
+
+    Omitted shocks are held at 0; unknown shocks, empty axes and grids over
+    ``CLEARPASS_STRESS_MAX_SCENARIOS`` raise ``ValueError``.
+    """
+    values = {k: np.atleast_1d(np.asarray(v, dtype="float64")) for k, v in axes.items()}
+    check_grid({k: len(v) for k, v in values.items()})
+    values = [values.get(k, np.zeros(1)) for k in SHOCKS]
+    mesh = np.meshgrid(*values, indexing="ij")
+    return {k: m.ravel() for k, m in zip(SHOCKS, mesh)}
+
+def _col(basics, key):
+    v = basics.get(key)
+    return np.nan if v is None else float(v)
+
+def apply_shocks(basics, grid, tax_rate=0.0):
+    """Shocked ``RATIO_INPUTS`` columns, one row per scenario of ``grid``."""
+    n = len(grid["revenue_pct"])
+    b = {k: _col(basics, k) for k in RATIO_INPUTS + ["Short-term Debt", "Long-term Debt"]}
+    z = {k: (0.0 if np.isnan(v) else v) for k, v in b.items()}
+    r, c = grid["revenue_pct"], grid["cogs_pct"]
+    rev_new = z["Revenue"] * (1 + r)
+    cogs_new = z["COGS"] * (1 + r) * (1 + c)
+    d_ebit = (rev_new - z["Revenue"]) - (cogs_new - z["COGS"])
+    d_int = (z["Short-term Debt"] + z["Long-term Debt"]) * grid["rate_bps"] / 10000.0
+    d_ni = (d_ebit - d_int) * (1 - tax_rate)
+    d_ar = z["Accounts Receivable"] * r + rev_new * grid["ar_days"] / 365.0
+    d_inv = z["Inventory"] * ((1 + r) * (1 + c) - 1) + cogs_new * grid["inventory_days"] / 365.0
+    d_wc = d_ar + d_inv
+    out = {k: np.full(n, v) for k, v in b.items() if k in RATIO_INPUTS}
+    for k, d in [("Revenue", rev_new - z["Revenue"]), ("COGS", cogs_new - z["COGS"]), ("EBIT", d_ebit),
+                 ("EBITDA", d_ebit), ("Net Income", d_ni), ("CFO", d_ni - d_wc), ("Cash", d_ni),
+                 ("Accounts Receivable", d_ar), ("Inventory", d_inv), ("Current Assets", d_wc + d_ni),
+                 ("Total Assets", d_wc + d_ni), ("Current Liabilities", d_wc), ("Total Liabilities", d_wc),
+                 ("Equity", d_ni)]:
+        out[k] = out[k] + d  # missing lines stay missing
+    # Repricing creates interest expense even when none was reported.
+    ie = out["Interest Expense"]
+    out["Interest Expense"] = np.where(np.isnan(ie), np.where(d_int != 0, d_int, np.nan), ie + d_int)
+    if b["Interest Paid"]:
+        out["Interest Paid"] = out["Interest Paid"] + d_int
+    return out
+
+def stress_ratios(basics, grid, tax_rate=0.0):
+    """Threshold metrics (unrounded, NaN when undefined) for every scenario of ``grid``."""
+    ratios = ratio_arrays(apply_shocks(basics, grid, tax_rate))
+    ebit_cov, ebitda_cov = ratios["Interest Coverage (EBIT)"], ratios["Interest Coverage (EBITDA)"]
+    # The memo quotes EBIT coverage and falls back to EBITDA coverage.
+    ratios["Interest Coverage"] = np.where(np.isnan(ebit_cov) | (ebit_cov == 0), ebitda_cov, ebit_cov)
+    return {k: ratios[k] for k in THRESHOLDS}
+
+def _passes(values, rule):
+    """Threshold test; a negative ceiling-type ratio (e.g. D/E on negative equity) fails."""
+    op, limit = rule
+    with np.errstate(invalid="ignore"):
+        return values >= limit if op == ">=" else (values <= limit) & (values >= 0)
+
+def _num(v, digits=2):
+    return None if v is None or not np.isfinite(v) else round(float(v), digits)
+
+def breakpoints(basics, thresholds=THRESHOLDS, tax_rate=0.0, steps=BREAKPOINT_STEPS):
+    """Smallest adverse one-factor shock at which each metric fails (0: fails already, None: never)."""
+    sweeps = {k: np.linspace(0.0, BREAKPOINT_RANGE[k], steps) for k in SHOCKS}
+    grid = {k: np.zeros(steps * len(SHOCKS)) for k in SHOCKS}
+    for i, k in enumerate(SHOCKS):
+        grid[k][i * steps:(i + 1) * steps] = sweeps[k]
+    metrics = stress_ratios(basics, grid, tax_rate)
+    out = {}
+    for i, k in enumerate(SHOCKS):
+        s = sweeps[k]
+        out[k] = {}
+        for name, rule in thresholds.items():
+            m = metrics[name][i * steps:(i + 1) * steps]
+            ok = _passes(m, rule)
+            if not ok[0]:
+                out[k][name] = 0.0
+                continue
+            fail = np.flatnonzero(~ok)
+            if not len(fail):
+                out[k][name] = None
+                continue
+            j = fail[0]
+            at = s[j]
+            if min(m[j - 1], m[j]) <= rule[1] <= max(m[j - 1], m[j]) and m[j] != m[j - 1]:
+                at = s[j - 1] + (rule[1] - m[j - 1]) / (m[j] - m[j - 1]) * (s[j] - s[j - 1])
+            out[k][name] = _num(at, 4)
+    return out
+
+@timed("stress")
+def stress_test(basics, grid=None, thresholds=THRESHOLDS, tax_rate=0.0):
+    """Distributions, pass rates and breakpoints of the threshold metrics over a scenario grid."""
+    grid = scenario_grid(**(DEFAULT_GRID if grid is None else grid))
+    metrics = stress_ratios(basics, grid, tax_rate)
+    base = stress_ratios(basics, scenario_grid(), tax_rate)
+    approve = np.ones(len(grid["revenue_pct"]), dtype=bool)
+    summary = {}
+    for name, rule in thresholds.items():
+        m = metrics[name]
+        ok = _passes(m, rule)
+        approve &= ok
+        finite = m[np.isfinite(m)]
+        pct = np.percentile(finite, PERCENTILES) if len(finite) else [np.nan] * len(PERCENTILES)
+        summary[name] = {
+            "threshold": f"{'≥' if rule[0] == '>=' else '≤'} {rule[1]:g}x",
+            "pass_rate": round(float(ok.mean()), 4),
+            "undefined": int(len(m) - len(finite)),
+            "min": _num(finite.min() if len(finite) else None),
+            **{f"p{p}": _num(v) for p, v in zip(PERCENTILES, pct)},
+            "max": _num(finite.max() if len(finite) else None),
+        }
+    return {
+        "scenarios": int(len(approve)),
+        "approve_rate": round(float(approve.mean()), 4),
+        "base": {name: _num(base[name][0]) for name in thresholds},
+        "metrics": summary,
+        "breakpoints": breakpoints(basics, thresholds, tax_rate),
+    }
@@ -0,0 +1,185 @@
+"""Synthetic financial statements for benchmarks and tests (deterministic per ``seed``).
+
+    python synth.py --rows 100000 --periods 5 --layout wide -o wide.csv
+    python synth.py --pdf --pages 40 --periods 3 -o statements.pdf
+"""
+import argparse
+import io
+
+import numpy as np
+
+# Labels per statement line; every one matches the default keyword map.
+LABELS = {
+    "revenue": ["Revenue", "Net Sales", "Sales", "Total Revenue", "Turnover"],
+    "cogs": ["Cost of Goods Sold", "Cost of Revenue", "COGS"],
+    "operating_expenses": ["Operating Expenses", "Selling, general and administrative", "SGA", "Research and development"],
+    "ebit": ["Operating Income", "EBIT"],
+    "interest_expense": ["Interest Expense", "Finance costs"],
+    "net_income": ["Net Income", "Net profit", "Profit for the period"],
+    "cash": ["Cash and cash equivalents", "Cash"],
+    "accounts_receivable": ["Accounts Receivable", "Trade receivables"],
+    "inventory": ["Inventory", "Inventories", "Merchandise inventory"],
+    "current_assets": ["Total current assets"],
+    "current_liabilities": ["Total current liabilities"],
+    "short_term_debt": ["Short-term debt", "Current portion of long-term debt"],
+    "long_term_debt": ["Long-term debt", "Non-current borrowings"],
+    "accounts_payable": ["Accounts payable", "Trade payables"],
+    "total_liabilities": ["Total liabilities"],
+    "equity": ["Total equity", "Total shareholders' equity"],
+    "total_assets": ["Total assets"],
+    "cfo": ["Net cash provided by operating activities", "Cash flow from operations"],
+    "interest_paid": ["Interest paid"],
+    "principal_repayment": ["Repayments of borrowings", "Loan repayments"],
+}
+
+# Lines that match no category.
+NOISE = ["Prepaid expenses", "Goodwill", "Intangible assets", "Deferred tax assets", "Right-of-use assets",
+         "Accrued expenses", "Customer deposits", "Provisions", "Other comprehensive income", "Share premium",
+         "Depreciation", "Amortisation", "Income tax", "Dividends declared", "Capital expenditure",
+         "Proceeds from disposals", "Foreign exchange differences", "Lease payments", "Other reserves",
+         "Investment property"]
+
+# Share of revenue for each line (before noise).
+_SCALE = {
+    "revenue": 1.0, "cogs": 0.62, "operating_expenses": 0.22, "ebit": 0.16, "interest_expense": 0.02,
+    "net_income": 0.10, "cash": 0.05, "accounts_receivable": 0.12, "inventory": 0.08, "current_assets": 0.30,
+    "current_liabilities": 0.18, "short_term_debt": 0.04, "long_term_debt": 0.20, "accounts_payable": 0.09,
+    "total_liabilities": 0.45, "equity": 0.40, "total_assets": 0.85, "cfo": 0.12, "interest_paid": 0.02,
+    "principal_repayment": 0.03,
+}
+
+# Lines that are one-off totals rather than sums of sub-ledger lines.
+_TOTALS = {"ebit", "net_income", "current_assets", "current_liabilities", "total_liabilities", "equity",
+           "total_assets", "cfo"}
+
+STATEMENTS = {
+    "Consolidated Statement of Income": ["revenue", "cogs", "operating_expenses", "ebit", "interest_expense", "net_income"],
+    "Consolidated Balance Sheet": ["cash", "accounts_receivable", "inventory", "current_assets", "accounts_payable",
+                                   "short_term_debt", "current_liabilities", "long_term_debt", "total_liabilities",
+                                   "equity", "total_assets"],
+    "Consolidated Statement of Cash Flows": ["cfo", "interest_paid", "principal_repayment"],
+}
+
+def _noisy(labels, rng):
+    """Decorate labels: random case or spacing, some "(Note n)" suffixes and trailing colons."""
+    n = len(labels)
+    style = rng.integers(6, size=n).tolist()
+    note = np.where(rng.random(n) < 0.15, rng.integers(1, 30, size=n), 0).tolist()
+    colon = (rng.random(n) < 0.1).tolist()
+    change = [None, str.upper, str.lower, lambda l: "  " + l.replace(" ", "  "), None, None]
+    out = []
+    for label, st, nt, cl in zip(labels, style, note, colon):
+        if change[st]:
+            label = change[st](label)
+        if nt:
+            label += f" (Note {nt})"
+        if cl:
+            label += ":"
+        out.append(label)
+    return out
+
+_FORMATS = ["{:.0f}", "{:,.0f}", "${:,.2f}", "({:,.0f})", "{:.2f}"]
+
+def _fmt(values, rng):
+    """Format a column of values in mixed styles; a few become accounting negatives ``(1,234)``."""
+    style = rng.integers(5, size=len(values))
+    style[(style == 3) & (rng.random(len(values)) > 0.05)] = 1
+    return [_FORMATS[st].format(v) for st, v in zip(style.tolist(), np.asarray(values).tolist())]
+
+def _lines(rows, seed):
+    """``[(category or None, label, share)]``: ``rows`` lines whose shares per category sum to 1."""
+    rng = np.random.default_rng(seed)
+    core = [(cat, LABELS[cat][0]) for cat in LABELS]
+    extra = max(rows - len(core), 0)
+    n_sub = extra // 2
+    sub_cats = [c for c in LABELS if c not in _TOTALS]
+    picks = rng.choice(sub_cats, size=n_sub) if n_sub else []
+    lines = [(cat, label) for cat, label in core]
+    lines += [(cat, f"{LABELS[cat][rng.integers(len(LABELS[cat]))]} - segment {k}") for k, cat in enumerate(picks)]
+    lines += [(None, f"{NOISE[rng.integers(len(NOISE))]} {k}") for k in range(extra - n_sub)]
+    lines = lines[:rows] if rows < len(core) else lines
+    weights = rng.gamma(2.0, size=len(lines))
+    totals = {}
+    for (cat, _), w in zip(lines, weights):
+        totals[cat] = totals.get(cat, 0.0) + w
+    labels = _noisy([label for _, label in lines], rng)
+    out = [(cat, label, w / totals[cat]) for (cat, _), label, w in zip(lines, labels, weights)]
+    order = rng.permutation(len(out))
+    return [out[i] for i in order]
+
+def synthetic_statement(rows=1000, periods=1, layout="long", seed=0, revenue=5_000_000.0, growth=0.06,
+                        formatted=True):
+    """A DataFrame statement of ``rows`` lines, ``layout`` "long" or "wide"."""
+    import pandas as pd
+    if layout not in ("long", "wide"):
+        raise ValueError("layout must be 'long' or 'wide'")
+    rng = np.random.default_rng(seed + 1)
+    lines = _lines(rows, seed)
+    cats = [c for c, _, _ in lines]
+    share = np.array([s for _, _, s in lines])
+    scale = np.array([_SCALE[c] if c else 0.01 for c in cats])
+    n_periods = periods if layout == "wide" else 1
+    levels = revenue * (1 + growth) ** np.arange(-n_periods + 1, 1)
+    noise = rng.normal(1.0, 0.05, size=(len(lines), n_periods))
+    values = np.round(share[:, None] * scale[:, None] * levels[None, :] * noise, 2)
+    labels = [label for _, label, _ in lines]
+    def col(v):
+        return _fmt(v, rng) if formatted else v
+    if layout == "long":
+        return pd.DataFrame({"Account": labels, "Value": col(values[:, 0])})
+    last_year = 2024
+    years = [str(last_year - n_periods + 1 + j) for j in range(n_periods)]
+    return pd.DataFrame({"Line Item": labels, **{y: col(values[:, j]) for j, y in enumerate(years)}})
+
+def synthetic_csv(rows=1000, periods=1, layout="long", seed=0, **kw) -> bytes:
+    return synthetic_statement(rows, periods, layout, seed, **kw).to_csv(index=False).encode("utf-8")
+
+def synthetic_pdf(pages=10, rows_per_page=35, periods=2, seed=0, notes_every=4) -> bytes:
+    """A multi-page PDF of statement tables; every ``notes_every``-th page is text-only notes."""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_pdf import PdfPages
+    rng = np.random.default_rng(seed)
+    titles = list(STATEMENTS)
+    years = [str(2024 - periods + 1 + j) for j in range(periods)]
+    buf = io.BytesIO()
+    with PdfPages(buf) as pdf:
+        for p in range(pages):
+            fig = Figure(figsize=(8.27, 11.69))
+            ax = fig.add_axes([0.06, 0.04, 0.88, 0.88]); ax.axis("off")
+            if notes_every and p % notes_every == notes_every - 1:
+                ax.set_title(f"Notes to the financial statements ({p + 1})", loc="left")
+                ax.text(0, 1, "\n".join(f"{k + 1}. {NOISE[(p + k) % len(NOISE)]} are measured at cost."
+                                        for k in range(20)), va="top", fontsize=9)
+            else:
+                title = titles[p % len(titles)]
+                ax.set_title(title, loc="left")
+                cats = STATEMENTS[title]
+                body = []
+                for r in range(rows_per_page):
+                    cat = cats[r] if r < len(cats) else None
+                    label = LABELS[cat][0] if cat else f"{NOISE[rng.integers(len(NOISE))]} {r}"
+                    base = 5_000_000 * (_SCALE[cat] if cat else 0.01)
+                    body.append(_noisy([label], rng) + _fmt(base * rng.normal(1, 0.05, size=periods), rng))
+                table = ax.table(cellText=[["Account", *years]] + body, loc="upper center", cellLoc="left",
+                                 colWidths=[0.55] + [0.45 / periods] * periods)
+                table.auto_set_font_size(False)
+                table.set_fontsize(7)
+            pdf.savefig(fig)
+    return buf.getvalue()
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Generate a synthetic financial statement.")
+    ap.add_argument("--rows", type=int, default=1000)
+    ap.add_argument("--periods", type=int, default=1)
+    ap.add_argument("--layout", choices=["long", "wide"], default="long")
+    ap.add_argument("--pdf", action="store_true", help="write a multi-page PDF instead of a CSV")
+    ap.add_argument("--pages", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("-o", "--output", required=True)
+    args = ap.parse_args()
+    if args.pdf:
+        data = synthetic_pdf(args.pages, periods=max(args.periods, 1), seed=args.seed)
+    else:
+        data = synthetic_csv(args.rows, args.periods, args.layout, args.seed)
+    with open(args.output, "wb") as fh:
+        fh.write(data)
@@ -0,0 +1,55 @@
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+import main
+import stress
+
+LONG = open('samples/sample_public_company_long.csv', 'rb').read()
+
+def _chunked(body, size=256):
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+def test_upload_limit_checks_content_length_and_chunked_bodies(monkeypatch):
+    monkeypatch.setitem(main.BODY_LIMITS, "/analyze", 300)
+    client = TestClient(main.app)
+    res = client.post("/analyze", files={"file": ("long.csv", LONG)})
+    assert res.status_code == 413 and "MB limit" in res.json()["detail"]
+    request = httpx.Request("POST", "http://testserver/analyze", files={"file": ("long.csv", LONG)})
+    body = request.read()
+    res = client.post("/analyze", content=_chunked(body), headers={"content-type": request.headers["content-type"]})
+    assert res.status_code == 413
+    small = b"Account,Value\nRevenue,10\n"
+    assert client.post("/analyze", files={"file": ("small.csv", small)}).status_code == 200
+
+def test_upload_limits_are_per_path(monkeypatch):
+    monkeypatch.setitem(main.BODY_LIMITS, "/analyze", 300)
+    client = TestClient(main.app)
+    assert client.post("/analyze", files={"file": ("long.csv", LONG)}).status_code == 413
+    assert client.post("/analyze/batch", files=[("files", ("long.csv", LONG))]).status_code == 200
+    assert client.get("/metrics").status_code == 200
+
+@pytest.mark.parametrize("path, form", [("/analyze", {}), ("/report", {"format": "docx"}), ("/stress", {})])
+def test_busy_server_answers_503(monkeypatch, path, form):
+    monkeypatch.setattr(main, "_analyze_inflight", main.ANALYZE_MAX_INFLIGHT)
+    res = TestClient(main.app).post(path, data=form, files={"file": ("long.csv", LONG)})
+    assert res.status_code == 503 and res.headers["retry-after"] == "1"
+    monkeypatch.setattr(main, "_analyze_inflight", 0)
+    assert TestClient(main.app).post(path, data=form, files={"file": ("long.csv", LONG)}).status_code == 200
+    assert main._analyze_inflight == 0
+
+@pytest.mark.parametrize("grid, detail", [
+    ('{"revenue_pct": []}', "empty shock axes"),
+    ('{"rate_bps": {"start": 0, "stop": 100, "num": 0}}', "empty shock axes"),
+    ('{"rate_bps": {"start": 0, "stop": 100, "num": 1000000000000}}', "more than the"),
+    ('{"rate_bps": {"start": 0, "stop": 100, "num": 30}, "ar_days": [0, 10, 20, 30]}', "grid has 120 scenarios"),
+])
+def test_stress_rejects_bad_grids_before_expanding_them(monkeypatch, grid, detail):
+    monkeypatch.setattr(stress, "MAX_SCENARIOS", 100)
+    res = TestClient(main.app).post("/stress", data={"grid": grid}, files={"file": ("long.csv", LONG)})
+    assert res.status_code == 422 and detail in res.json()["detail"]
+
+def test_report_with_unknown_naics_uses_default_benchmarks():
+    res = TestClient(main.app).post("/report", data={"format": "docx", "industry": "999999"},
+                                    files={"file": ("long.csv", LONG)})
+    assert res.status_code == 200
@@ -0,0 +1,41 @@
+import io
+import json
+import zipfile
+from fastapi.testclient import TestClient
+import main
+
+LONG = open('samples/sample_public_company_long.csv', 'rb').read()
+WIDE = open('samples/sample_public_company_wide.csv', 'rb').read()
+
+def _zip(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("statements/", "")
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+def _batch(files, **params):
+    client = TestClient(main.app)
+    res = client.post("/analyze/batch", params=params, files=[("files", f) for f in files])
+    assert res.status_code == 200 and res.headers["content-type"].startswith("application/x-ndjson")
+    return {line["file"]: line for line in map(json.loads, res.text.splitlines())}
+
+def test_batch_expands_zips_and_reports_errors_per_file():
+    files = [("plain.csv", LONG), ("broken.zip", b"not a zip"),
+             ("book.zip", _zip({"statements/wide.csv": WIDE, "statements/one_column.csv": b"Account\nCash\n"}))]
+    lines = _batch(files)
+    assert sorted(lines) == ["broken.zip", "plain.csv", "statements/one_column.csv", "statements/wide.csv"]
+    single = TestClient(main.app).post("/analyze", files={"file": ("plain.csv", LONG)}).json()
+    assert lines["plain.csv"]["ratios"] == single["ratios"]
+    assert lines["statements/wide.csv"]["basics"]["Revenue"] == 1350000
+    assert lines["broken.zip"]["error"].startswith("BadZipFile")
+    assert lines["statements/one_column.csv"]["error"].startswith("ValueError")
+
+def test_batch_refuses_statements_over_inflight_cap():
+    lines = _batch([("book.zip", _zip({"long.csv": LONG, "wide.csv": WIDE})), ("plain_wide.csv", WIDE)],
+                   max_inflight_mb=500 / (1024 * 1024), workers=64)
+    assert sorted(lines) == ["long.csv", "plain_wide.csv", "wide.csv"]
+    assert "ratios" in lines["long.csv"]
+    assert "in-flight limit" in lines["wide.csv"]["error"]
+    assert "in-flight limit" in lines["plain_wide.csv"]["error"]
@@ -0,0 +1,27 @@
+from shared.parsing import parse_financials, parse_records, read_csv_records, parse_financials_periods
+from synth import synthetic_statement, synthetic_csv, LABELS
+from bench import compare
+
+def test_synthetic_long_covers_every_line():
+    df = synthetic_statement(500, seed=4)
+    assert list(df.columns) == ['Account', 'Value'] and len(df) == 500
+    basics, agg = parse_financials(df)
+    assert all(agg[c] > 0 for c in LABELS)
+    assert basics['Revenue'] > basics['COGS'] > 0
+    assert synthetic_statement(500, seed=4).equals(df)
+
+def test_synthetic_wide_and_csv():
+    df = synthetic_statement(200, periods=7, layout='wide', seed=2)
+    assert list(df.columns) == ['Line Item'] + [str(y) for y in range(2018, 2025)]
+    basics, _ = parse_financials_periods(df)
+    assert list(basics.index) == [str(y) for y in range(2018, 2025)]
+    assert (basics['Revenue'] > 0).all()
+    data = synthetic_csv(300, seed=9)
+    assert str(parse_records(*read_csv_records(data))) == str(parse_financials(synthetic_statement(300, seed=9)))
+
+def test_compare_flags_regressions_only():
+    base = {'stages': {'a': {'min_ms': 100.0, 'peak_mb': 10.0}, 'b': {'min_ms': 0.5, 'peak_mb': 0.1}}}
+    cur = {'stages': {'a': {'min_ms': 120.0, 'peak_mb': 14.0}, 'b': {'min_ms': 1.5, 'peak_mb': 0.1}}}
+    assert compare(base, cur, threshold=0.25) == [('a', 'peak_mb', 10.0, 14.0)]
+    assert compare(base, cur, threshold=0.1) == [('a', 'min_ms', 100.0, 120.0), ('a', 'peak_mb', 10.0, 14.0)]
+    assert compare(base, {'stages': {}}) == []
@@ -0,0 +1,43 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from shared import parsing
+from shared.parsing import BenchmarkStore, benchmark_for, BENCHMARKS
+
+def _table(tmp_path):
+    rows = [('42', '', 2023, 1.0), ('4234', '', 2022, 2.0), ('4234', '', 2024, 3.0),
+            ('4234', 'small', 2024, 4.0), ('423450', '', 2024, 5.0)]
+    df = pd.DataFrame([(n, b, y, v, v, v, v, v) for n, b, y, v in rows],
+                      columns=['naics', 'size_band', 'year', 'current_ratio_median', 'quick_ratio_median',
+                               'd_to_e_median', 'profit_margin_median', 'roa_median'])
+    path = str(tmp_path / "bench.csv")
+    df.to_csv(path, index=False)
+    return path
+
+def test_store_hierarchy_bands_years_and_mmap(tmp_path):
+    store = BenchmarkStore.open(_table(tmp_path))
+    store = BenchmarkStore.open(str(tmp_path / "bench.csv"))
+    assert isinstance(store.values, np.memmap)
+    assert sorted(os.listdir(tmp_path / "bench.csv.idx")) == ['keys.npy', 'source.txt', 'values.npy']
+    assert store.lookup('423450')['Current Ratio'] == 5.0
+    assert store.lookup('423490')['matched_naics'] == '4234'
+    assert store.lookup('423490', year=2023)['Current Ratio'] == 2.0
+    assert store.lookup('423490', size_band='Small')['Current Ratio'] == 4.0
+    assert store.lookup('429999')['matched_naics'] == '42'
+    with pytest.raises(KeyError):
+        store.lookup('999999')
+    bulk = store.lookup_many(['423450', '423490', '999999'], years=[None, 2023, None])
+    assert bulk['Current Ratio'].tolist()[:2] == [5.0, 2.0] and np.isnan(bulk['Current Ratio'].iloc[2])
+
+def test_benchmark_for_names_and_codes():
+    assert benchmark_for('Retail')['Current Ratio'] == 1.4
+    assert benchmark_for('311999') == benchmark_for('Food Manufacturing')
+    assert benchmark_for('Unknown') == benchmark_for(BENCHMARKS['industry_name'].iloc[0])
+
+def test_benchmark_for_falls_back_instead_of_raising(tmp_path, monkeypatch):
+    default = benchmark_for(BENCHMARKS['industry_name'].iloc[0])
+    assert benchmark_for('999999') == default
+    monkeypatch.setattr(parsing, "_benchmark_store", BenchmarkStore.open(_table(tmp_path)))
+    assert benchmark_for('423499')['Current Ratio'] == 3.0
+    assert benchmark_for('Unknown') == benchmark_for('999999') == default
@@ -0,0 +1,61 @@
+import re
+import numpy as np
+import pandas as pd
+from shared.parsing import parse_financials, default_keywords, classifier_for, _norm, _pattern_literals, KeywordClassifier
+
+def _reference_agg(df, kw_map):
+    agg = {k:0.0 for k in kw_map.keys()}
+    for _, row in df.iterrows():
+        name = _norm(row["Account"])
+        for k, pats in kw_map.items():
+            if any(re.search(p, name) for p in pats):
+                if pd.notnull(row["Value"]):
+                    agg[k] += float(row["Value"])
+    return agg
+
+def test_classifier_matches_regex_loop(noisy_long):
+    kw = default_keywords()
+    df = noisy_long()
+    basics, agg = parse_financials(df, kw)
+    ref = df.copy()
+    ref["Value"] = pd.to_numeric(ref["Value"].str.replace(",","", regex=False).str.replace("(","-", regex=False).str.replace(")","", regex=False), errors="coerce")
+    assert agg == _reference_agg(ref, kw)
+
+def test_classifier_multi_category_and_fallback():
+    clf = classifier_for()
+    hits = dict(zip(clf.categories, clf.classify(_norm("Cost of Revenue"))))
+    assert hits['cogs'] and hits['revenue']
+    kw = {'dup':[r'(a)\1'], 'plain':[r'\bab\b']}
+    fb = classifier_for(kw)
+    assert fb.classify("aa ab") == (True, True)
+
+def test_missing_account_label_is_its_own_row():
+    df = pd.DataFrame({"Account": ["Revenue", np.nan, "Inventory"], "Value": [100.0, 7.0, 5.0]})
+    _, agg = parse_financials(df)
+    assert agg['revenue'] == 100.0 and agg['inventory'] == 5.0
+
+def test_pattern_literals():
+    assert _pattern_literals(r'\bfinance costs?\b') == {'finance cost'}
+    assert _pattern_literals(r'\b(revenue|net sales)\b') == {'revenue', 'net sales'}
+    assert _pattern_literals(r'\bstock[- ]in[- ]trade\b') == {'stock'}
+    assert _pattern_literals(r'\bliabilities\b(?!.*and equity)') == {'liabilities'}
+    assert _pattern_literals(r'a\.b+c') == {'a.'}
+    for p in [r'(?i)total', r'(?i:total)', r'(a)\1', r'\x41', r'\d+', r'(x|\w)', r'a?b*', '']:
+        assert _pattern_literals(p) is None
+
+_PATTERNS = [r'\btotal\b', r'(?i)TOTAL', r'(?i:net) income', r'\bcosts?\b', r'(cost|price) of (goods|sales)',
+             r'[ck]ash', r'cash\.', r'\$\d+', r'^\d{4}$', r'(?:a|b)+c', r'debt(?=s)', r'(?<!non-)current',
+             r'\bebitda?\b', r'x{2,}', r'(?P<w>re)venue', r'(?#note)sga', r'pay(ables?|ments)', r'\w+ & \w+',
+             r'loan|', r'(?s).*equity', r'[^a-z ]', r'\(note \d+\)', r'a{0}b', r'inventor(y|ies)']
+
+def test_prefilter_matches_plain_search():
+    rng = np.random.default_rng(11)
+    words = ["total", "TOTAL", "Net", "net", "income", "cost", "costs", "price", "of", "goods", "sales", "cash",
+             "kash", "cash.", "$12", "2024", "aabc", "debts", "debt", "non-current", "current", "ebit", "ebitda",
+             "xx", "x", "revenue", "sga", "payables", "payments", "r & d", "loan", "equity", "(note 4)", "b",
+             "inventory", "inventories", "&", "-"]
+    labels = [" ".join(rng.choice(words, size=rng.integers(1, 5))) for _ in range(3000)] + ["", "2024"]
+    kw = {f"p{i}": [p] for i, p in enumerate(_PATTERNS)}
+    clf = KeywordClassifier(kw)
+    for label in labels:
+        assert clf.classify(label) == tuple(re.search(p, label) is not None for p in _PATTERNS), label
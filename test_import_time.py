@@ -0,0 +1,23 @@
+import json
+import subprocess
+import sys
+
+def _heavy_after_import(module):
+    code = (f"import sys, json, {module}; "
+            "print(json.dumps([m for m in ('pandas','matplotlib','pdfplumber','docx') if m in sys.modules]))")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def test_api_and_core_import_without_heavy_deps():
+    assert _heavy_after_import("shared.parsing") == []
+    assert _heavy_after_import("main") == []
+    assert _heavy_after_import("rendering") == []
+    assert "pdfplumber" not in _heavy_after_import("parser_pdf")
+
+def test_lean_csv_core_matches_pandas_path():
+    import pandas as pd
+    from shared.parsing import parse_financials, parse_records, read_csv_records
+    for path in ['samples/sample_public_company_long.csv', 'samples/sample_public_company_wide.csv']:
+        with open(path, 'rb') as fh:
+            lean = parse_records(*read_csv_records(fh.read()))
+        assert str(lean) == str(parse_financials(pd.read_csv(path)))
@@ -0,0 +1,34 @@
+from jobs import JobStore, work
+
+def test_job_queue_survives_restart_and_runs(tmp_path):
+    db = str(tmp_path / "jobs.sqlite")
+    store = JobStore(db)
+    data = open('samples/sample_public_company_wide.csv', 'rb').read()
+    job_id = store.submit("wide.csv", data, {"company": "Acme", "fiscal_year": "2024"})
+    assert store.claim()[0] == job_id
+    with store._connect() as con:
+        con.execute("UPDATE jobs SET pid = ? WHERE id = ?", (2**22 + 12345, job_id))
+    assert JobStore(db).recover() == 1
+    work(db, once=True)
+    job = store.get(job_id)
+    assert job["status"] == "done" and job["progress"] == 1.0
+    assert job["result"]["basics"]["Revenue"] == 1350000
+    assert "Acme (FY 2024)" in job["result"]["memo"]
+    store.ttl = -1
+    assert store.purge() == 1 and store.get(job_id) is None
+
+def test_expired_leases_are_reclaimed_from_any_host_until_attempts_run_out(tmp_path):
+    db = str(tmp_path / "jobs.sqlite")
+    store = JobStore(db, lease_seconds=30, max_attempts=2)
+    job_id = store.submit("wide.csv", b"Account,Value\n", {})
+    for attempt in range(2):
+        assert store.claim()[0] == job_id
+        store.heartbeat(job_id)
+        assert store.recover() == 0
+        with store._connect() as con:
+            con.execute("UPDATE jobs SET host = 'elsewhere', updated = updated - 60 WHERE id = ?", (job_id,))
+        assert store.recover() == 1
+        store.heartbeat(job_id)
+    job = store.get(job_id)
+    assert job["status"] == "failed" and job["error"] == "Worker lost 2 times"
+    assert store.claim() is None
@@ -0,0 +1,36 @@
+import pandas as pd
+from shared import metrics
+from shared.parsing import parse_financials
+
+def test_parse_financials_stages_and_counters():
+    metrics.enable(True)
+    metrics.reset()
+    df = pd.read_csv('samples/sample_public_company_long.csv')
+    with metrics.collect() as trace:
+        parse_financials(df)
+    assert {'reshape', 'normalize', 'classify', 'aggregate'} <= set(trace.stages)
+    assert trace.counters['clearpass_rows_total stage=parse'] == len(df)
+    text = metrics.prometheus_text()
+    assert '# TYPE clearpass_stage_seconds histogram' in text
+    assert 'clearpass_stage_seconds_count{stage="classify"} 1' in text
+    assert f'clearpass_rows_total{{stage="parse"}} {len(df)}' in text
+    assert 'clearpass_stage_seconds_bucket{stage="classify",le="+Inf"} 1' in text
+
+def test_disabled_records_nothing():
+    metrics.reset()
+    metrics.enable(False)
+    try:
+        with metrics.collect() as trace:
+            parse_financials(pd.read_csv('samples/sample_public_company_wide.csv'))
+        assert trace.stages == {} and trace.counters == {}
+        assert metrics.prometheus_text() == "\n"
+    finally:
+        metrics.enable(True)
+
+def test_profiled_block():
+    with metrics.profiled() as prof:
+        sum(range(1000))
+    assert 'function calls' in prof['profile']
+    with metrics.profiled(enabled=False) as prof:
+        pass
+    assert prof == {}
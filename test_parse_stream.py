@@ -0,0 +1,42 @@
+import io
+import numpy as np
+import pandas as pd
+from shared.parsing import parse_financials, parse_financials_csv
+
+def test_stream_matches_in_memory_long(gl_csv):
+    data = gl_csv()
+    expected = parse_financials(pd.read_csv(io.StringIO(data)))
+    got = parse_financials_csv(io.StringIO(data), chunksize=777)
+    assert str(got) == str(expected)
+    assert expected[1]['revenue'] != 0
+
+def test_stream_matches_in_memory_wide():
+    path = 'samples/sample_public_company_wide.csv'
+    assert str(parse_financials_csv(path, chunksize=5)) == str(parse_financials(pd.read_csv(path)))
+
+def test_stream_keeps_full_precision_values():
+    rng = np.random.default_rng(11)
+    labels = rng.choice(["Revenue", "Cash", "Inventory", "Net income", "Interest expense"], 3000)
+    vals = [f"{v:.17g}" for v in rng.normal(0, 1e6, 3000) * rng.random(3000)]
+    for text in (vals, vals[:-1] + ["(1,234.5)"]):
+        data = pd.DataFrame({"Account": labels, "Value": text}).to_csv(index=False)
+        expected = parse_financials(pd.read_csv(io.StringIO(data), float_precision="round_trip"))
+        assert parse_financials_csv(io.StringIO(data), chunksize=500) == expected
+    exact = sum(float(v) for a, v in zip(labels, vals[:-1] + ["-1234.5"]) if a == "Revenue")
+    assert parse_financials_csv(io.StringIO(data))[1]['revenue'] == exact
+
+def test_lean_reader_matches_pandas_paths():
+    from shared.parsing import parse_records, read_csv_records
+    rng = np.random.default_rng(5)
+    labels = ["Revenue", "Cash", "Inventories", "Trade receivables", "Total equity", "Interest expense", ""]
+    odd = ["$1,234.50", "(12.5)", "١٢٣", "1_000", "", "n/a", " 7 ", "1e3", "€ 5"]
+    for seed in range(5):
+        n = 400
+        vals = [f"{v:.17g}" for v in rng.normal(0, 1e6, n) * rng.random(n)]
+        mixed = [rng.choice(odd) if i % 7 == 0 else v for i, v in enumerate(vals)]
+        frame = pd.DataFrame({"Account": rng.choice(labels, n), "2023": vals, "2024": mixed, "dup": vals})
+        for data in (frame.to_csv(index=False), frame.to_csv(index=False).replace("dup", "2024", 1),
+                     frame[["Account", "2024"]].to_csv(index=False), frame[["Account", "2023"]].to_csv(index=False)):
+            expected = str(parse_financials(pd.read_csv(io.StringIO(data), float_precision="round_trip")))
+            assert str(parse_records(*read_csv_records(data.encode()))) == expected
+            assert str(parse_financials_csv(io.StringIO(data), chunksize=150)) == expected
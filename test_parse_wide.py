@@ -1,3 +1,4 @@
+import pytest
 import pandas as pd
 from shared.parsing import parse_financials, compute_ratios
 
@@ -8,3 +9,14 @@ def test_parse_wide_latest_year():
     ratios = compute_ratios(basics)
     assert basics['Revenue'] == 1350000
     assert ratios['Current Ratio'] == round(170000/85000,2)
+
+def test_parse_wide_all_periods():
+    from shared.parsing import parse_financials_periods, compute_ratios_periods
+    df = pd.read_csv('samples/sample_public_company_wide.csv')
+    basics, _ = parse_financials_periods(df)
+    ratios = compute_ratios_periods(basics)
+    assert list(basics.index) == ['2022', '2023', '2024']
+    for y in basics.index:
+        b, _ = parse_financials(df[['Line Item', y]].rename(columns={'Line Item':'Account', y:'Value'}))
+        assert basics.loc[y].to_dict() == pytest.approx(b, nan_ok=True)
+        assert ratios.loc[y].to_dict() == compute_ratios(b)
@@ -0,0 +1,59 @@
+import pytest
+from shared import metrics
+import parser_pdf
+from parser_pdf import extract_tables_to_long, iter_page_rows, clear_page_cache
+from synth import synthetic_pdf
+
+@pytest.fixture(scope="module")
+def pdf():
+    return synthetic_pdf(pages=4, rows_per_page=12, seed=1)
+
+def _pages_extracted(fn):
+    metrics.enable(True)
+    with metrics.collect() as trace:
+        out = fn()
+    return out, trace.counters.get("clearpass_pages_total kind=tables", 0)
+
+def test_process_pool_matches_serial_and_reuses_cached_pages(pdf):
+    clear_page_cache()
+    serial = extract_tables_to_long(pdf, cache=False, locate=False)
+    pooled, extracted = _pages_extracted(lambda: extract_tables_to_long(pdf, workers=2, locate=False))
+    assert extracted == 4 and len(serial) > 0
+    assert pooled.reset_index(drop=True).equals(serial.reset_index(drop=True))
+    again, extracted = _pages_extracted(lambda: extract_tables_to_long(pdf, locate=False))
+    assert extracted == 0 and again.equals(serial)
+
+def test_iter_page_rows_streams_pages_in_order(pdf):
+    clear_page_cache()
+    pages = list(iter_page_rows(pdf, pages=[2, 0]))
+    assert [i for i, _ in pages] == [0, 2]
+    assert pages[0][1][1][0].strip().lower() == 'revenue'
+    rows = [r for _, page_rows in iter_page_rows(pdf) for r in page_rows]
+    assert rows == list(extract_tables_to_long(pdf, locate=False).itertuples(index=False, name=None))
+    assert len(parser_pdf._page_cache) == 4
+
+def test_locate_statement_pages_skips_notes(pdf):
+    pages = parser_pdf.locate_statement_pages(pdf)
+    assert [p['statement'] for p in pages] == ['income_statement', 'balance_sheet', 'cash_flow', None]
+    assert [p['candidate'] for p in pages] == [True, True, True, False]
+    assert all(p['heading'] for p in pages[:3])
+
+def test_wide_extraction_names_years_and_records_source(pdf):
+    clear_page_cache()
+    wide = parser_pdf.extract_tables_to_wide(pdf, locate=True)
+    assert list(wide.columns) == ['Account', '2023', '2024', 'Page', 'Statement']
+    assert sorted(set(wide['Page'])) == [0, 1, 2]
+    assert wide.groupby('Page')['Statement'].first().tolist() == ['income_statement', 'balance_sheet', 'cash_flow']
+    assert wide.drop(columns='Statement').equals(parser_pdf.extract_tables_to_wide(pdf).drop(columns='Statement'))
+    clear_page_cache()
+    assert parser_pdf.extract_tables_to_wide(pdf, locate=True, workers=2).equals(wide)
+
+def test_header_needs_whole_period_cells():
+    table = [["Account", "FY 2023", "2024"], ["Net income", "202400", "205000"], ["Cash", "1,000", "2,000"]]
+    rows = list(parser_pdf._wide_rows({'page': 0, 'statement': None}, [table]))
+    assert rows[0] == {'Account': 'Net income', '2023': '202400', '2024': '205000', 'Page': 0, 'Statement': None}
+    assert rows[1]['2023'] == '1,000' and rows[1]['2024'] == '2,000'
+    table = [["Account", "FY23", "Notes", "Restated"], ["Cash", "5", "6", "7"]]
+    assert list(parser_pdf._wide_rows({'page': 0, 'statement': None}, [table]))[0]['Col 1'] == '5'
+    table = [["Account", "FY23", "FY24"], ["Cash", "5", "6"]]
+    assert list(parser_pdf._wide_rows({'page': 0, 'statement': None}, [table]))[0]['FY24'] == '6'
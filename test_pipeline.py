@@ -0,0 +1,33 @@
+from pipeline import app_graph
+from result_cache import ResultCache
+
+def _graph(tmp_path):
+    return app_graph(ResultCache(str(tmp_path / "results.sqlite")))
+
+def _inputs(**kw):
+    data = open('samples/sample_public_company_wide.csv', 'rb').read()
+    return {"files": [("wide.csv", data)], "company": "DemoCo", "fiscal_year": "2024",
+            "industry": "Wholesale Trade", **kw}
+
+def test_widget_change_recomputes_only_downstream(tmp_path):
+    g = _graph(tmp_path)
+    inputs = _inputs()
+    for name in ["summary", "comparison", "charts"]:
+        g.get(name, inputs)
+    assert {"ingest", "merge", "analysis", "benchmark", "trends", "charts"} <= set(g.computed)
+    g.computed.clear()
+    inputs = _inputs(industry="Retail")
+    for name in ["summary", "comparison", "charts"]:
+        g.get(name, inputs)
+    assert g.computed == ["benchmark", "comparison"]
+    g.computed.clear()
+    g.get("comparison", _inputs())
+    assert g.computed == []
+
+def test_new_upload_recomputes_everything_and_charts_are_png(tmp_path):
+    g = _graph(tmp_path)
+    charts = g.get("charts", _inputs())
+    assert charts and all(png.startswith(b"\x89PNG") for png in charts.values())
+    g.computed.clear()
+    g.get("charts", _inputs(files=[]))
+    assert g.computed == ["ingest", "merge", "trends", "charts"]
@@ -0,0 +1,36 @@
+import math
+import numpy as np
+import pandas as pd
+from shared.parsing import compute_ratios, compute_ratios_frame, parse_financials, RATIO_INPUTS
+
+def _same(expected, got):
+    return all((v is None and math.isnan(got[k])) or v == got[k] for k, v in expected.items())
+
+def test_frame_matches_scalar(random_basics):
+    df = random_basics()
+    frame = compute_ratios_frame(df)
+    for i, row in df.iterrows():
+        expected = compute_ratios(row.to_dict())
+        got = frame.loc[i].to_dict()
+        for k, v in expected.items():
+            assert (v is None and math.isnan(got[k])) or v == got[k], (i, k, v, got[k])
+
+def test_frame_matches_sample():
+    basics, _ = parse_financials(pd.read_csv('samples/sample_public_company_long.csv'))
+    frame = compute_ratios_frame(pd.DataFrame([basics]))
+    assert _same(compute_ratios(basics), frame.iloc[0].to_dict())
+
+def test_frame_rounding_boundaries():
+    vals = np.array([2.675, 1.005, 0.125, 0.135, -2.675, 1e15 + 0.5, 123.445])
+    df = pd.DataFrame({'Current Assets': vals, 'Current Liabilities': np.ones_like(vals)})
+    assert compute_ratios_frame(df)['Current Ratio'].tolist() == [round(float(v), 2) for v in vals]
+
+def test_frame_missing_columns_act_like_missing_keys():
+    rng = np.random.default_rng(3)
+    for _ in range(200):
+        keys = [k for k in RATIO_INPUTS if rng.random() < 0.5]
+        b = {k: round(float(rng.normal(0, 1e5)), 1) if rng.random() < 0.8 else 0.0 for k in keys}
+        assert _same(compute_ratios(b), compute_ratios_frame(pd.DataFrame([b], columns=keys)).iloc[0].to_dict())
+    b = {'Current Assets': 100, 'Current Liabilities': 50, 'CFO': 30, 'Interest Expense': 10}
+    got = compute_ratios_frame(pd.DataFrame([b])).iloc[0]
+    assert got['Quick Ratio'] == 2.0 and got['DSCR (CFO / Debt Service)'] == 3.0
@@ -0,0 +1,36 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import rendering
+from result_cache import ResultCache
+
+BASICS = {"Revenue": 1000.0, "Net Income": 100.0}
+RATIOS = {"Profit Margin (%)": 10.0}
+BENCH = {"Current Ratio": 1.5}
+
+def test_report_key_is_stable_and_covers_every_input():
+    key = rendering.report_key("pdf", "Acme", "2024", "Retail", BASICS, RATIOS, BENCH)
+    assert key == rendering.report_key("pdf", "Acme", "2024", "Retail", dict(reversed(BASICS.items())), RATIOS, BENCH)
+    assert key.startswith("report:")
+    others = [("docx", "Acme", "2024", "Retail", BASICS, RATIOS, BENCH),
+              ("pdf", "Acme", "2023", "Retail", BASICS, RATIOS, BENCH),
+              ("pdf", "Acme", "2024", "Retail", {**BASICS, "Revenue": 1001.0}, RATIOS, BENCH)]
+    assert len({key, *(rendering.report_key(*args) for args in others)}) == 4
+
+def test_concurrent_identical_submits_share_one_render(monkeypatch):
+    started, release, calls = threading.Event(), threading.Event(), []
+    def slow(*args):
+        calls.append(args)
+        started.set()
+        release.wait(5)
+        return b"%PDF"
+    monkeypatch.setitem(rendering._RENDERERS, "pdf", slow)
+    monkeypatch.setattr(rendering, "default_cache", lambda cache=ResultCache(None): cache)
+    args = ("pdf", "Acme", "2024", "Retail", BASICS, RATIOS, BENCH)
+    first = rendering.submit_render(*args)
+    assert started.wait(5)
+    with ThreadPoolExecutor(8) as ex:
+        futures = list(ex.map(lambda _: rendering.submit_render(*args), range(8)))
+    assert all(f is first for f in futures)
+    release.set()
+    assert first.result(5) == b"%PDF" and len(calls) == 1
+    assert rendering.render(*args) == b"%PDF" and len(calls) == 1
@@ -0,0 +1,34 @@
+import os
+import pytest
+from result_cache import ResultCache, cache_key, content_digest
+
+def test_result_cache_tiers_and_eviction(tmp_path):
+    cache = ResultCache(str(tmp_path / "results.sqlite"), max_bytes=4000, memory_items=2)
+    keys = [cache_key("frame:csv", content_digest(bytes([i]))) for i in range(5)]
+    for k in keys:
+        cache.put(k, b"x" * 1500)
+    assert cache.get(keys[-1]) == b"x" * 1500
+    cache.clear(disk=False)
+    assert cache.get(keys[-1]) == b"x" * 1500
+    assert cache.get(keys[0]) is None
+    assert cache.stats["memory_hits"] == 1 and cache.stats["disk_hits"] == 1
+    assert cache.stats["misses"] == 1 and cache.stats["evictions"] >= 2
+    assert cache.get_or_compute(keys[0], lambda: 42) == 42
+
+def test_memory_tier_is_bounded_by_bytes():
+    cache = ResultCache(None, memory_items=100, memory_bytes=2500)
+    for i in range(5):
+        cache.put(str(i), b"x" * 1000)
+    assert [cache.get(str(i)) is not None for i in range(5)] == [False, False, False, True, True]
+    cache.put("big", b"x" * 3000)
+    assert cache.get("big") is None and cache.get("4") is None
+
+def test_disk_tier_refuses_shared_directories(tmp_path):
+    cache = ResultCache(str(tmp_path / "private" / "results.sqlite"))
+    assert os.stat(tmp_path / "private").st_mode & 0o777 == 0o700
+    cache.put("k", {"ratios": 1})
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(PermissionError):
+        ResultCache(str(shared / "results.sqlite"))
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from shared.parsing import compute_ratios
+from stress import scenario_grid, stress_ratios, stress_test, breakpoints
+
+BASICS = {'Revenue': 1_350_000.0, 'COGS': 800_000.0, 'EBIT': 215_000.0, 'EBITDA': 260_000.0, 'Net Income': 150_000.0,
+          'Cash': 62_000.0, 'Accounts Receivable': 50_000.0, 'Inventory': 25_000.0, 'Current Assets': 170_000.0,
+          'Current Liabilities': 85_000.0, 'Total Liabilities': 240_000.0, 'Equity': 340_000.0, 'Total Assets': 580_000.0,
+          'Interest Expense': 24_000.0, 'CFO': 110_000.0, 'Interest Paid': 24_000.0, 'Principal Repayment': 20_000.0,
+          'Short-term Debt': 30_000.0, 'Long-term Debt': 170_000.0}
+
+def test_unshocked_matches_compute_ratios():
+    base = stress_ratios(BASICS, scenario_grid())
+    ratios = compute_ratios(BASICS)
+    for k in ['DSCR (CFO / Debt Service)', 'Current Ratio', 'Debt-to-Equity']:
+        assert round(float(base[k][0]), 2) == ratios[k]
+    assert round(float(base['Interest Coverage'][0]), 2) == ratios['Interest Coverage (EBIT)']
+
+def test_grid_shape_and_monotone_rate_shock():
+    grid = scenario_grid(revenue_pct=[-0.1, 0.0], rate_bps=np.arange(0, 500, 100))
+    assert len(grid['rate_bps']) == 10
+    cov = stress_ratios(BASICS, scenario_grid(rate_bps=np.arange(0, 500, 100)))['Interest Coverage']
+    assert np.all(np.diff(cov) < 0)
+    with pytest.raises(ValueError):
+        scenario_grid(fx_pct=[0.1])
+    with pytest.raises(ValueError, match="empty shock axes"):
+        scenario_grid(revenue_pct=[], rate_bps=[100])
+
+def test_rate_breakpoint_matches_closed_form():
+    # CFO - debt * x = 1.25 * (interest + principal + debt * x)
+    debt = 200_000.0
+    x = (110_000.0 - 1.25 * 44_000.0) / (2.25 * debt)
+    bp = breakpoints(BASICS)['rate_bps']
+    assert bp['DSCR (CFO / Debt Service)'] == pytest.approx(x * 10_000, abs=0.01)
+    assert bp['Interest Coverage'] is None  # needs more than the 2000 bps swept
+
+def test_summary():
+    res = stress_test(BASICS)
+    assert res['scenarios'] == 9 * 7 * 9 * 7 * 7
+    assert res['base']['Current Ratio'] == 2.0
+    assert 0 < res['approve_rate'] <= min(m['pass_rate'] for m in res['metrics'].values())
+    dscr = res['metrics']['DSCR (CFO / Debt Service)']
+    assert dscr['min'] <= dscr['p5'] <= dscr['p50'] <= dscr['p95'] <= dscr['max']